@@ -1,9 +1,15 @@
 from briefcase.enums import incons_enum
+from briefcase.factor_registry import factor_registry
 
 
 class AdmissibilityConstraints:
-    def __init__(self, priority_order):
+    def __init__(self, priority_order, mrd_threshold=1):
+        """
+        @param priority_order: the priority order cases are admitted to
+        @param mrd_threshold: the largest relevant difference the MRD constraint admits a new case with
+        """
         self.priority_order = priority_order
+        self.mrd_threshold = mrd_threshold
 
     def is_case_admissible(self, new_reason, new_defeated, incons):
         """
@@ -11,12 +17,22 @@ class AdmissibilityConstraints:
         case base priority order.
         @return: True when admissible, and False when admission should be denied
         """
+        return self.is_case_admissible_bits(factor_registry.encode(new_reason), factor_registry.encode(new_defeated),
+                                            incons)
+
+    def is_case_admissible_bits(self, new_reason, new_defeated, incons):
+        """
+        Same as is_case_admissible, with the reason and defeated factors of the new case given as bitsets
+        (see FactorRegistry), which is what the constraints run on
+        @return: True when admissible, and False when admission should be denied
+        """
         method_map = {
-            incons_enum.NO: self.no_incons,
-            incons_enum.NO_NEW: self.no_new_incons,
-            incons_enum.NO_INVOLVEMENT: self.no_involvement_incons,
-            incons_enum.HORTY: self.horty_incons,
-            incons_enum.NO_CORRUPTION: self.no_corruption_incons,
+            incons_enum.NO: self.no_incons_bits,
+            incons_enum.NO_NEW: self.no_new_incons_bits,
+            incons_enum.NO_INVOLVEMENT: self.no_involvement_incons_bits,
+            incons_enum.HORTY: self.horty_incons_bits,
+            incons_enum.NO_CORRUPTION: self.no_corruption_incons_bits,
+            incons_enum.MRD: self.mrd_bits,
             incons_enum.ALL: lambda *args: True,
         }
 
@@ -27,50 +43,80 @@ class AdmissibilityConstraints:
             raise ValueError("Invalid inconsistency value")
 
     def no_incons(self, new_reason, new_defeated):
+        """A) admissibility constraint, see no_incons_bits"""
+        return self.no_incons_bits(factor_registry.encode(new_reason), factor_registry.encode(new_defeated))
+
+    def no_incons_bits(self, new_reason, new_defeated):
         """A) admissibility constraint
         1. for Γ ∪ {C} there does not exist any cases C′, C′′ ∈ Γ ∪ {C} where C′ ‖ C ′'
         @return: True when case base is already consistent AND when new case is not inconsistent ,
                 with any case in the case base, otherwise False"""
         if self.priority_order.is_cb_consistent():
-            if self.priority_order.is_consistent(new_reason, new_defeated):
+            if self.priority_order.is_consistent_bits(new_reason, new_defeated):
                 return True
         return False
 
     def no_involvement_incons(self, new_reason, new_defeated):
+        """B part 1) admissibility constraint, see no_involvement_incons_bits"""
+        return self.no_involvement_incons_bits(factor_registry.encode(new_reason), factor_registry.encode(new_defeated))
+
+    def no_involvement_incons_bits(self, new_reason, new_defeated):
         """B part 1) admissibility constraint
         2. For all cases in the CB, the new case is not inconsistent with any case
         @return: True when new case is not inconsistent with any case in the case base,
                 otherwise False"""
-        return self.priority_order.is_consistent(new_reason, new_defeated)
+        return self.priority_order.is_consistent_bits(new_reason, new_defeated)
 
     def no_new_incons(self, new_reason, new_defeated):
+        """B part 2) admissibility constraint, see no_new_incons_bits"""
+        return self.no_new_incons_bits(factor_registry.encode(new_reason), factor_registry.encode(new_defeated))
+
+    def no_new_incons_bits(self, new_reason, new_defeated):
         """B part 2) admissibility constraint
         3. Priority order remains the same
         @return: True when the new case is an existing claim in the priority order,
                 otherwise False"""
-        return self.priority_order.is_existing_claim(new_reason, new_defeated)
+        return self.priority_order.is_existing_claim_bits(new_reason, new_defeated)
 
     def horty_incons(self, new_reason, new_defeated):
+        """B admissibility constraint / HORTY admissibility, see horty_incons_bits"""
+        return self.horty_incons_bits(factor_registry.encode(new_reason), factor_registry.encode(new_defeated))
+
+    def horty_incons_bits(self, new_reason, new_defeated):
         """B admissibility constraint / HORTY admissibility
         @return: True when new case does not alter the priority order, or it is consistent with case base"""
-        return self.no_involvement_incons(new_reason, new_defeated) or self.no_new_incons(new_reason, new_defeated)
+        return (self.no_involvement_incons_bits(new_reason, new_defeated)
+                or self.no_new_incons_bits(new_reason, new_defeated))
 
     def no_corruption_incons(self, new_reason, new_defeated):
+        """C admissibility constraint, see no_corruption_incons_bits"""
+        return self.no_corruption_incons_bits(factor_registry.encode(new_reason), factor_registry.encode(new_defeated))
+
+    def no_corruption_incons_bits(self, new_reason, new_defeated):
         """C admissibility constraint
          4. For all cases in the CB the new case is only inconsistent with cases which are otherwise inconsistent
          @return: True when new case is inconsistent with any case which is otherwise tainted/inconsistent
                   in the case base, otherwise False"""
-        incons = self.priority_order.get_incons_pairs_with_case(new_reason, new_defeated)
+        incons = self.priority_order.get_incons_pairs_bits(new_reason, new_defeated)
         if not incons:
             return True
 
         for case_pairs in incons:
-            if self.priority_order.is_consistent(case_pairs[0], case_pairs[1]):
+            if self.priority_order.is_consistent_bits(case_pairs[0], case_pairs[1]):
                 return False
         return True
 
     def mrd(self, new_reason, new_defeated):
+        """Minimal relevant differences admissibility constraint, see mrd_bits"""
+        return self.mrd_bits(factor_registry.encode(new_reason), factor_registry.encode(new_defeated))
+
+    def mrd_bits(self, new_reason, new_defeated):
         """Minimal relevant differences admissibility constraint
          4. For all cases in the CB the new case must be minimally relevant different to
-            a case with the same polarity"""
-        pass
\ No newline at end of file
+            a case with the same polarity
+         @return: True when the minimal relevant difference of the new case from a case with the same polarity
+                  has at most mrd_threshold factors, otherwise False. Cases with an empty side are precedents too,
+                  though they have no priority in the order. With a threshold of 0 the new case must be forced by a
+                  case, as for NO_NEW, or have no relevant difference from a case with an empty side"""
+        distance, pairs = self.priority_order.get_minimal_rd_pairs_bits(new_reason, new_defeated, self.mrd_threshold)
+        return distance is not None
\ No newline at end of file
@@ -0,0 +1,219 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from briefcase.case_base import CaseBase
+from briefcase.case_stream import iter_cases
+from briefcase.enums import incons_enum
+from briefcase.synthetic import iter_synthetic_cases
+
+"""
+Benchmarks of the case base entry points over the test splits of the masters_thesis datasets.
+For each dataset and admissibility constraint the cases are added one at a time with CaseBase.add_case, and then
+PriorityOrder.is_consistent, CaseBase.count_tainted_cases and PowerDetector.cb_power are timed on the case base
+they built. Each entry point gets its throughput and latency percentiles, and each run the peak memory of building
+the case base.
+Synthetic case bases of any size (see synthetic.iter_synthetic_cases) can be benchmarked alongside them.
+Results are written as JSON, and compare_results lists the entry points which got slower than in an earlier run.
+e.g. python -m briefcase.benchmarks --datasets "telco-corr-*" --output new.json --baseline old.json
+"""
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "tests" / "test_big_datasets" / "masters_thesis"
+ENTRY_POINTS = ("add_case", "is_consistent", "count_tainted_cases", "cb_power", "estimate_cb_power")
+DATASET_PATTERNS = ("mushroom/data/mushrooms-*-test-*.yaml", "telco/data/telco-*-test-*.yaml")
+
+
+def find_datasets(data_dir=DATA_DIR, name_pattern="*"):
+    """
+    @param data_dir: the masters_thesis directory
+    @param name_pattern: glob pattern the file names must also match, e.g. "telco-corr-*"
+    @return: sorted list of the paths of the mushrooms and telco test splits
+    """
+    return sorted(path for pattern in DATASET_PATTERNS for path in Path(data_dir).glob(pattern)
+                  if path.match(name_pattern))
+
+
+def latency_stats(timings):
+    """
+    @param timings: list of the seconds each call took
+    @return: dictionary of the 'calls', the 'throughput' in calls per second, and the 'mean', 'p50', 'p90', 'p99'
+             and 'max' latencies in seconds
+    """
+    if not timings:
+        return {"calls": 0}
+    ordered = sorted(timings)
+    total = sum(ordered)
+
+    def percentile(p):
+        # nearest rank
+        return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+    return {
+        "calls": len(ordered),
+        "throughput": len(ordered) / total if total else float("inf"),
+        "mean": total / len(ordered),
+        "p50": percentile(50),
+        "p90": percentile(90),
+        "p99": percentile(99),
+        "max": ordered[-1],
+    }
+
+
+def _time_calls(function, args_list):
+    timings = []
+    for args in args_list:
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def benchmark_cases(cases, incons="ALL", repeats=5, memory=True, exact_power=True):
+    """
+    @param cases: list of cases, added in order
+    @param incons: the admissibility constraint to add them with, a name of incons_enum
+    @param repeats: number of times count_tainted_cases and cb_power are timed
+    @param memory: whether to measure the peak memory of building the case base, which builds it a second time
+                   under tracemalloc, so that the timings are not slowed by it
+    @param exact_power: whether to time cb_power, or estimate_cb_power with 1000 samples for case bases whose
+                        factor lists are too wide to count exactly
+    @return: dictionary of the 'incons', the number of 'cases' and 'admitted', the 'peak_memory' in bytes (or None),
+             and the latency_stats of 'add_case', 'is_consistent', 'count_tainted_cases' and 'cb_power'
+             (or 'estimate_cb_power')
+    """
+    cb = CaseBase([])
+    add_timings = _time_calls(cb.add_case, [(case, incons) for case in cases])
+    consistent_timings = _time_calls(cb.order.is_consistent, [(case.reason, case.defeated) for case in cases
+                                                              if case.reason and case.defeated])
+    tainted_timings = _time_calls(cb.count_tainted_cases, [()] * repeats)
+    if exact_power:
+        power_name, power_timings = "cb_power", _time_calls(cb.order.PD.cb_power, [()] * repeats)
+    else:
+        power_name, power_timings = "estimate_cb_power", _time_calls(cb.order.PD.estimate_cb_power,
+                                                                     [(1000, 0.95, 0)] * repeats)
+
+    peak_memory = None
+    if memory:
+        tracemalloc.start()
+        try:
+            traced = CaseBase([])
+            for case in cases:
+                traced.add_case(case, incons)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "incons": incons,
+        "cases": len(cases),
+        "admitted": len(cb.cases),
+        "peak_memory": peak_memory,
+        "add_case": latency_stats(add_timings),
+        "is_consistent": latency_stats(consistent_timings),
+        "count_tainted_cases": latency_stats(tainted_timings),
+        power_name: latency_stats(power_timings),
+    }
+
+
+def run_benchmarks(paths, constraints=None, repeats=5, memory=True, log=None, synthetic_sizes=()):
+    """
+    @param paths: the case files to benchmark, in any format case_stream.iter_cases reads
+    @param constraints: names of incons_enum to benchmark each file with, all of them by default
+    @param repeats: see benchmark_cases
+    @param memory: see benchmark_cases
+    @param log: function given a line of progress after each run, e.g. print, or None
+    @param synthetic_sizes: numbers of cases of synthetic case bases to benchmark too, named synthetic-<size>,
+                            with 1% of their cases inconsistent with an earlier case, and their power estimated
+    @return: dictionary of the 'environment' and the list of 'results', each the benchmark_cases dictionary of a
+             dataset and constraint with the 'dataset' file name added
+    """
+    constraints = list(constraints or [incons.name for incons in incons_enum])
+    datasets = [(Path(path).name, lambda path=path: list(iter_cases(path)), True) for path in paths]
+    datasets += [(f"synthetic-{size}", lambda size=size: list(iter_synthetic_cases(size, conflict_rate=0.01)), False)
+                 for size in synthetic_sizes]
+    results = []
+    for name, load, exact_power in datasets:
+        cases = load()
+        for incons in constraints:
+            result = {"dataset": name, **benchmark_cases(cases, incons, repeats, memory, exact_power)}
+            results.append(result)
+            if log:
+                log(f"{result['dataset']} {incons}: {result['admitted']}/{result['cases']} admitted, "
+                    f"add_case {result['add_case'].get('throughput', 0):.0f}/s")
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare_results(baseline, current, tolerance=0.1):
+    """
+    @param baseline: the run_benchmarks dictionary of an earlier run
+    @param current: the run_benchmarks dictionary of this run
+    @param tolerance: the fraction of throughput an entry point can lose before it counts as slower
+    @return: list of (dataset, incons, entry point, baseline throughput, current throughput) of the entry points
+             of the runs in both which got slower by more than the tolerance
+    """
+    previous = {(result["dataset"], result["incons"]): result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get((result["dataset"], result["incons"]))
+        if before is None:
+            continue
+        for entry_point in ENTRY_POINTS:
+            old = before.get(entry_point, {}).get("throughput")
+            new = result.get(entry_point, {}).get("throughput")
+            if old and new is not None and new < old * (1 - tolerance):
+                regressions.append((result["dataset"], result["incons"], entry_point, old, new))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of the case base over the masters_thesis datasets.")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR, help="the masters_thesis directory")
+    parser.add_argument("--datasets", help='glob pattern of the dataset file names, e.g. "telco-*", '
+                                           'all of them by default unless --synthetic is given')
+    parser.add_argument("--synthetic", type=int, nargs="*", default=[], help="sizes of synthetic case bases")
+    parser.add_argument("--constraints", nargs="*", help="names of incons_enum, all of them by default")
+    parser.add_argument("--repeats", type=int, default=5, help="times count_tainted_cases and cb_power are run")
+    parser.add_argument("--no-memory", action="store_true", help="skip measuring the peak memory")
+    parser.add_argument("--output", type=Path, help="file to write the JSON results to, stdout by default")
+    parser.add_argument("--baseline", type=Path, help="JSON results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="throughput lost before a run counts as slower")
+    args = parser.parse_args(argv)
+
+    paths = []
+    if args.datasets or not args.synthetic:
+        paths = find_datasets(args.data_dir, args.datasets or "*")
+        if not paths:
+            parser.error(f"no datasets matching {args.datasets or '*'} in {args.data_dir}")
+    report = run_benchmarks(paths, args.constraints, args.repeats, not args.no_memory,
+                            log=lambda line: print(line, file=sys.stderr), synthetic_sizes=args.synthetic)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            regressions = compare_results(json.load(file), report, args.tolerance)
+        for dataset, incons, entry_point, old, new in regressions:
+            print(f"slower: {dataset} {incons} {entry_point} {old:.1f}/s -> {new:.1f}/s "
+                  f"({new / old - 1:+.0%})", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
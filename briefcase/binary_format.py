@@ -0,0 +1,160 @@
+import json
+import struct
+from collections.abc import Sequence
+
+import numpy as np
+
+from briefcase.bit_matrix import to_bool_matrix
+from briefcase.case import Case
+from briefcase.enums import decision_enum
+from briefcase.factor import Factor
+from briefcase.factor_registry import factor_registry
+
+"""
+Compact binary file format for a list of cases, which can be memory-mapped and read lazily.
+
+Layout:
+    MAGIC
+    header length, a little-endian uint32
+    header, utf-8 JSON: {"version", "n_cases", "row_bytes", "factors": [[name, polarity name], ...]}
+    pi rows, delta rows, reason rows: n_cases x row_bytes uint8 each, with bit i of a row set
+        when the case has factor i of the header's factor list (little-endian bit order)
+    decisions: n_cases uint8 values of decision_enum
+"""
+
+MAGIC = b"BRIEFCB\x01"
+VERSION = 1
+
+
+def pack_cases(cases):
+    """
+    @param cases: list of cases
+    @return: the factors the cases are numbered by, and the bytes of the pi, delta and reason rows and the decisions
+    """
+    universe = 0
+    for case in cases:
+        universe |= case.pi_bits | case.delta_bits
+    # factors are numbered in the file by their order within the universe
+    factors = [factor_registry.factors[position] for position in range(universe.bit_length())
+               if universe >> position & 1]
+
+    body = [np.packbits(to_bool_matrix([getattr(case, attribute) for case in cases], universe),
+                        axis=1, bitorder="little").tobytes()
+            for attribute in ("pi_bits", "delta_bits", "reason_bits")]
+    body.append(np.array([case.decision.value for case in cases], dtype=np.uint8).tobytes())
+    return factors, b"".join(body)
+
+
+def save_cases(cases, path):
+    """
+    @param cases: list of cases
+    @param path: file to write the cases to
+    """
+    cases = list(cases)
+    factors, body = pack_cases(cases)
+    header = json.dumps({
+        "version": VERSION,
+        "n_cases": len(cases),
+        "row_bytes": (len(factors) + 7) // 8,
+        "factors": [[factor.name, factor.polarity.name] for factor in factors],
+    }).encode("utf-8")
+
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.write(struct.pack("<I", len(header)))
+        file.write(header)
+        file.write(body)
+
+
+def load_cases(path, mmap=True):
+    """
+    @param path: file written by save_cases
+    @param mmap: memory-map the file rather than reading it into memory
+    @return: a CaseFile, a sequence which builds each case when it is read
+    """
+    return CaseFile(path, mmap)
+
+
+class CaseFile(Sequence):
+    """
+    Read-only sequence of the cases in a file written by save_cases.
+    Only the header is parsed when the file is opened, a case is built from its rows when it is accessed.
+    """
+
+    CHUNK_SIZE = 1024
+
+    def __init__(self, path, mmap=True):
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"'{path}' is not a binary case base file")
+            (header_length,) = struct.unpack("<I", file.read(4))
+            header = json.loads(file.read(header_length).decode("utf-8"))
+        if header["version"] != VERSION:
+            raise ValueError(f"Unsupported binary case base version {header['version']}")
+
+        factors = [Factor(name, decision_enum[polarity]) for name, polarity in header["factors"]]
+        n_cases, row_bytes = header["n_cases"], header["row_bytes"]
+        offset = len(MAGIC) + 4 + header_length
+        size = 3 * n_cases * row_bytes + n_cases
+        if mmap and size:
+            data = np.memmap(path, dtype=np.uint8, mode="r", offset=offset, shape=(size,))
+        else:
+            data = np.fromfile(path, dtype=np.uint8, offset=offset, count=size)
+        self._set_body(data, factors, n_cases)
+
+    @classmethod
+    def from_buffer(cls, buffer, factors, n_cases):
+        """
+        @param buffer: bytes-like object holding a body made by pack_cases, e.g. a shared memory block
+        @param factors: the factors returned by pack_cases
+        @param n_cases: the number of cases packed
+        @return: a CaseFile reading the cases from the buffer without copying it
+        """
+        case_file = cls.__new__(cls)
+        row_bytes = (len(factors) + 7) // 8
+        case_file._set_body(np.frombuffer(buffer, dtype=np.uint8, count=3 * n_cases * row_bytes + n_cases),
+                            factors, n_cases)
+        return case_file
+
+    def _set_body(self, data, factors, n_cases):
+        self.factors = factors
+        row_bytes = (len(factors) + 7) // 8
+        block = n_cases * row_bytes
+        self.pi_rows, self.delta_rows, self.reason_rows = (
+            data[i * block:(i + 1) * block].reshape(n_cases, row_bytes) for i in range(3))
+        self.decisions = data[3 * block:]
+
+    def __len__(self):
+        return len(self.decisions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("case index out of range")
+        return Case(self._factors_of(self.pi_rows[index]),
+                    self._factors_of(self.delta_rows[index]),
+                    decision_enum(int(self.decisions[index])),
+                    self._factors_of(self.reason_rows[index]))
+
+    def __iter__(self):
+        # unpack the rows a chunk at a time rather than one case at a time
+        for start in range(0, len(self), self.CHUNK_SIZE):
+            stop = start + self.CHUNK_SIZE
+            pi, delta, reason = (self._factor_lists(rows[start:stop])
+                                 for rows in (self.pi_rows, self.delta_rows, self.reason_rows))
+            for i, decision in enumerate(self.decisions[start:stop].tolist()):
+                yield Case(pi[i], delta[i], decision_enum(decision), reason[i])
+
+    def _factor_lists(self, rows):
+        factor_lists = [[] for _ in range(len(rows))]
+        row_numbers, positions = np.nonzero(np.unpackbits(rows, axis=1, bitorder="little"))
+        for row, position in zip(row_numbers.tolist(), positions.tolist()):
+            factor_lists[row].append(self.factors[position])
+        return [frozenset(factors) for factors in factor_lists]
+
+    def _factors_of(self, row):
+        positions = np.flatnonzero(np.unpackbits(row, bitorder="little"))
+        return frozenset(self.factors[position] for position in positions.tolist())
@@ -0,0 +1,69 @@
+import numpy as np
+
+from briefcase.factor_registry import iter_bits
+
+"""
+Helpers for checking many bitsets against each other at once, by unpacking them into boolean matrices
+with a row per bitset and a column per factor.
+Subset checks become matrix products: a is a subset of b when a has no factors in the complement of b.
+"""
+
+
+def to_bool_matrix(bitsets, universe):
+    """
+    @param bitsets: list of bitsets
+    @param universe: bitset of the factors to give columns to, every bitset should be within it
+    @return: boolean matrix of shape (len(bitsets), number of factors in universe)
+    """
+    n_bytes = max((universe.bit_length() + 7) // 8, 1)
+    raw = b"".join(bits.to_bytes(n_bytes, "little") for bits in bitsets)
+    packed = np.frombuffer(raw, dtype=np.uint8).reshape(len(bitsets), n_bytes)
+    matrix = np.unpackbits(packed, axis=1, bitorder="little").astype(bool)
+    return matrix[:, list(iter_bits(universe))]
+
+
+def from_bool_matrix(matrix, positions):
+    """
+    @param matrix: boolean matrix with a row per bitset
+    @param positions: the bit position of each column of the matrix
+    @return: list of the bitsets of the rows, the inverse of to_bool_matrix
+    """
+    scattered = np.zeros((len(matrix), max(positions, default=0) + 1), dtype=bool)
+    scattered[:, positions] = matrix
+    packed = np.packbits(scattered, axis=1, bitorder="little")
+    n_bytes = packed.shape[1]
+    raw = packed.tobytes()
+    return [int.from_bytes(raw[start:start + n_bytes], "little") for start in range(0, len(raw), n_bytes)]
+
+
+def subset_matrix(a, b):
+    """
+    @param a: boolean matrix of factor sets, one per row
+    @param b: boolean matrix of factor sets with the same columns
+    @return: boolean matrix where [i, j] is True when row i of a is a subset of row j of b
+    """
+    # counts of the factors of a_i outside b_j, float32 so the product runs on BLAS and is exact up to 2 ** 24
+    return (a.astype(np.float32) @ (~b).astype(np.float32).T) == 0
+
+
+def conflict_indices(reasons_a, defeated_a, reasons_b, defeated_b, chunk_size=1024):
+    """
+    @param reasons_a: boolean matrix of the reasons of one list of pairs
+    @param defeated_a: boolean matrix of the defeated sets of the same pairs
+    @param reasons_b: boolean matrix of the reasons of another list of pairs, with the same columns
+    @param defeated_b: boolean matrix of the defeated sets of those pairs
+    @param chunk_size: number of rows of a checked at a time, to bound memory
+    @return: arrays (i, j) of every pair a_i inconsistent with pair b_j, where the reason of each is
+             a subset of the defeated set of the other
+    """
+    outside_b = (~defeated_b).astype(np.float32).T
+    reasons_b = reasons_b.astype(np.float32)
+    rows, cols = [np.empty(0, dtype=np.intp)], [np.empty(0, dtype=np.intp)]
+    for start in range(0, len(reasons_a), chunk_size):
+        stop = start + chunk_size
+        a_within_b = reasons_a[start:stop].astype(np.float32) @ outside_b == 0
+        b_within_a = (reasons_b @ (~defeated_a[start:stop]).astype(np.float32).T == 0).T
+        i, j = np.nonzero(a_within_b & b_within_a)
+        rows.append(i + start)
+        cols.append(j)
+    return np.concatenate(rows), np.concatenate(cols)
@@ -1,5 +1,6 @@
 from briefcase.enums import decision_enum
 from briefcase.factor import Factor
+from briefcase.factor_registry import factor_registry
 
 
 class Case:
@@ -12,6 +13,9 @@ class Case:
     reason = name="The child ate their dinner", polarity=pi
     """
 
+    __slots__ = ("pi_factors", "delta_factors", "decision", "reason", "_defeated",
+                 "pi_bits", "delta_bits", "reason_bits", "defeated_bits", "_hash")
+
     @classmethod
     def from_dict(cls, dic):
         """
@@ -46,6 +50,18 @@ class Case:
 
         return cls(pi_factors, delta_factors, decision_value, reason_factors)
 
+    def to_dict(self):
+        """
+        @return: a dictionary of 'pi', 'delta' and 'reason' factor name lists, and a 'decision',
+        the inverse of from_dict. Factor names are sorted so the same case always gives the same dictionary.
+        """
+        return {
+            "pi": sorted((f.name for f in self.pi_factors), key=str),
+            "delta": sorted((f.name for f in self.delta_factors), key=str),
+            "decision": self.decision.name,
+            "reason": sorted((f.name for f in self.reason), key=str),
+        }
+
     def __init__(
             self,
             pi_factors=frozenset(),
@@ -60,21 +76,69 @@ class Case:
         a general rule to express burden of proof, e.g., that we default for the defense.
 
         We might want to have an additional typology of cases to allow different burden of proofs for
-        different sorts of cases, e.g., civil vs. criminal."""
+        different sorts of cases, e.g., civil vs. criminal.
+
+        Cases are immutable, so the defeated factors, the bitset encodings and the hash are worked out once here."""
+
+        pi_factors = frozenset(pi_factors)
+        delta_factors = frozenset(delta_factors)
+        reason = frozenset(reason)
+        # bitset encodings of the factor sets, see FactorRegistry
+        self._init_fields(pi_factors, delta_factors, decision, reason, factor_registry.encode(pi_factors),
+                          factor_registry.encode(delta_factors), factor_registry.encode(reason))
 
-        self.pi_factors = pi_factors
-        self.delta_factors = delta_factors
-        self.decision = decision
-        self.reason = reason
+    @classmethod
+    def from_bits(cls, pi_bits, delta_bits, decision, reason_bits):
+        """
+        @param pi_bits: bitset of the pi factors (see FactorRegistry)
+        @param delta_bits: bitset of the delta factors
+        @param decision: the decision of the case
+        @param reason_bits: bitset of the reason factors
+        @return: the case with these factors, built from bitsets which are already encoded
+        """
+        case = cls.__new__(cls)
+        case._init_fields(factor_registry.decode(pi_bits), factor_registry.decode(delta_bits), decision,
+                          factor_registry.decode(reason_bits), pi_bits, delta_bits, reason_bits)
+        return case
+
+    def _init_fields(self, pi_factors, delta_factors, decision, reason, pi_bits, delta_bits, reason_bits):
+        init = object.__setattr__
+        init(self, "pi_factors", pi_factors)
+        init(self, "delta_factors", delta_factors)
+        init(self, "decision", decision)
+        init(self, "reason", reason)
+        init(self, "pi_bits", pi_bits)
+        init(self, "delta_bits", delta_bits)
+        init(self, "reason_bits", reason_bits)
+        if decision == decision_enum.pi:
+            init(self, "_defeated", delta_factors)
+            init(self, "defeated_bits", self.delta_bits)
+        elif decision == decision_enum.delta:
+            init(self, "_defeated", pi_factors)
+            init(self, "defeated_bits", self.pi_bits)
+        else:
+            init(self, "_defeated", None)
+            init(self, "defeated_bits", 0)
+        init(self, "_hash", hash((self.pi_bits, self.delta_bits, decision, self.reason_bits)))
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Case is immutable")
+
+    def __delattr__(self, key):
+        raise AttributeError("Case is immutable")
+
+    def __reduce__(self):
+        """
+        @return: recreate through the constructor, so the bitsets are encoded with the unpickling process's registry
+        """
+        return Case, (self.pi_factors, self.delta_factors, self.decision, self.reason)
 
-    def defeated(self):  # TODO: make property
+    @property
+    def defeated(self):
         """
         @return: the factors which were defeated by the decision e.g. for a decision of polarity pi, the delta factors
         """
-        if self.decision == decision_enum.pi:
-            return self.delta_factors
-        elif self.decision == decision_enum.delta:
-            return self.pi_factors
+        return self._defeated
 
     def relevant_diff_from(self, other_case):
         """
@@ -88,12 +152,12 @@ class Case:
             # get all reasons for this case which are in other case but not in this case
             reasons = other_case.reason - self.reason
             # get all defeated for this case which are in this case but not in other case
-            defeated = self.defeated() - other_case.defeated()
+            defeated = self.defeated - other_case.defeated
         else:  # outcome is different
             # get all reasons for other case which are in other case but not in this one
-            reasons = other_case.reason - self.defeated()
+            reasons = other_case.reason - self.defeated
             # get all defeated in this case which are in other case but not in this case
-            defeated = self.reason - other_case.defeated()
+            defeated = self.reason - other_case.defeated
         return reasons | defeated
 
     def __str__(self):
@@ -125,10 +189,14 @@ class Case:
 
     def __eq__(self, other):
         if isinstance(other, Case):
+            # equal bitsets are equal factor sets, since every case is encoded with the one registry
             return (
-                self.pi_factors == other.pi_factors and
-                self.delta_factors == other.delta_factors and
+                self.pi_bits == other.pi_bits and
+                self.delta_bits == other.delta_bits and
                 self.decision == other.decision and
-                self.reason == other.reason
+                self.reason_bits == other.reason_bits
             )
         return False
+
+    def __hash__(self):
+        return self._hash
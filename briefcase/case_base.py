@@ -1,13 +1,122 @@
+from collections import OrderedDict, deque
+
+import networkx as nx
+import numpy as np
+
+from briefcase.binary_format import load_cases, save_cases
+from briefcase.bit_matrix import from_bool_matrix
+from briefcase.case import Case
+from briefcase.cow_dict import CowDict
 from briefcase.enums import incons_enum, decision_enum
+from briefcase.factor import Factor
+from briefcase.factor_registry import factor_registry
 from briefcase.priority_order import PriorityOrder
 
 
 class CaseBase:
+    # number of fact situations forced_decision keeps the answer for
+    FORCED_CACHE_SIZE = 2 ** 16
+
     def __init__(self, caselist=[], empty_sides=False):
-        self.cases = []
+        self._cases = []  # the cases in the order they were added, with None where a case was removed
+        self.removed_count = 0  # number of None left in _cases
+        self.case_positions = None  # case -> deque of its indices in _cases, built on the first removal
+        self.cases_by_pair = CowDict(list)  # cases for each (reason, defeated) bitset pair
         self.order = PriorityOrder(empty_sides)
+        self.version = 0  # number of cases added and removed, for caches of queries on the cases
+        self.forced_cache = OrderedDict()  # (pi bits, delta bits) -> forced decision, least recently used first
+        self.forced_cache_version = (self.version, self.order.version)
         self.add_unsafe_cases(caselist)
 
+    @classmethod
+    def from_cases_bulk(cls, cases, empty_sides=False):
+        """
+        @param cases: list of cases
+        @return: a CaseBase of the cases, as CaseBase(cases) would give.
+        Builds the order in one pass and finds its inconsistencies for the whole batch at once,
+        see PriorityOrder.bulk_add_cases
+        """
+        case_base = cls(empty_sides=empty_sides)
+        added = case_base.order.bulk_add_cases(cases)
+        case_base._extend_cases(added)
+        for case in added:
+            case_base.cases_by_pair.owned_values((case.reason_bits, case.defeated_bits)).append(case)
+        return case_base
+
+    @classmethod
+    def from_dataframe(cls, df, y_name, factor_polarities, empty_sides=False):
+        """
+        @param df: DataFrame with a column per factor, which the row has when the value is true, and an outcome column
+        @param y_name: the outcome column, rows with a true outcome are decided for pi and the rest for delta
+        @param factor_polarities: dictionary of each factor column to its polarity, "pi", "delta" or "un",
+                                  as the cluster_factors functions give. Columns which are not pi or delta are left out
+        @return: a CaseBase with a case per row, the reason of each case being all the factors of its decision.
+        The bitsets of the cases are built a column at a time with numpy, and identical rows share one case,
+        rather than going through a dictionary per row and Case.from_dict
+        """
+        polarities = {column: decision_enum[polarity] if isinstance(polarity, str) else polarity
+                      for column, polarity in factor_polarities.items()}
+        columns = {polarity: [column for column in df.columns
+                              if column != y_name and polarities.get(column) == polarity]
+                   for polarity in (decision_enum.pi, decision_enum.delta)}
+        pi_columns, delta_columns = columns[decision_enum.pi], columns[decision_enum.delta]
+
+        rows = np.hstack([df[pi_columns].to_numpy(dtype=bool), df[delta_columns].to_numpy(dtype=bool),
+                          df[[y_name]].to_numpy(dtype=bool)])
+        unique_rows, inverse = np.unique(rows, axis=0, return_inverse=True)
+        pi_bits = from_bool_matrix(unique_rows[:, :len(pi_columns)],
+                                   [factor_registry.bit(Factor(column, decision_enum.pi)) for column in pi_columns])
+        delta_bits = from_bool_matrix(unique_rows[:, len(pi_columns):-1],
+                                      [factor_registry.bit(Factor(column, decision_enum.delta))
+                                       for column in delta_columns])
+
+        unique_cases = []
+        for pi, delta, outcome in zip(pi_bits, delta_bits, unique_rows[:, -1].tolist()):
+            if outcome:
+                unique_cases.append(Case.from_bits(pi, delta, decision_enum.pi, pi))
+            else:
+                unique_cases.append(Case.from_bits(pi, delta, decision_enum.delta, delta))
+        return cls.from_cases_bulk([unique_cases[k] for k in inverse.reshape(-1).tolist()], empty_sides)
+
+    @classmethod
+    def load(cls, path, empty_sides=False):
+        """
+        @param path: file written by CaseBase.save
+        @return: a CaseBase of the cases in the file
+        """
+        return cls.from_cases_bulk(load_cases(path), empty_sides)
+
+    @property
+    def cases(self):
+        """
+        @return: list of the cases, in the order they were added
+        """
+        if self.removed_count:
+            self._compact()
+        return self._cases
+
+    def save(self, path):
+        """
+        @param path: file to write the cases to, in the binary format of binary_format
+        """
+        save_cases(self.cases, path)
+
+    def fork(self):
+        """
+        @return: a copy of the case base which cases can be added to without changing this one, or vice versa.
+        A fork left untouched is a snapshot of the case base as it is now, see PriorityOrder.fork
+        """
+        case_base = CaseBase.__new__(CaseBase)
+        case_base._cases = list(self.cases)
+        case_base.removed_count = 0
+        case_base.case_positions = None
+        case_base.cases_by_pair = self.cases_by_pair.fork()
+        case_base.order = self.order.fork()
+        case_base.version = self.version
+        case_base.forced_cache = OrderedDict()
+        case_base.forced_cache_version = (case_base.version, case_base.order.version)
+        return case_base
+
     def check_incons_value(self, incons):
         # Check inconsistency is valid
         try:
@@ -24,8 +133,8 @@ class CaseBase:
         for case in cases:
             if self.order.unsafe_add_case(case):
                 filtered_cases.append(case)
-        self.cases.extend(filtered_cases)
-
+                self.cases_by_pair.owned_values((case.reason_bits, case.defeated_bits)).append(case)
+        self._extend_cases(filtered_cases)
 
     def add_cases(self, cases, incons="ALL"):
         for case in cases:
@@ -33,11 +142,64 @@ class CaseBase:
 
     def add_case(self, case, incons="ALL"):
         if self.order.safe_add_case(case, self.check_incons_value(incons)):
-            self.cases.append(case)
+            self._extend_cases([case])
+            self.cases_by_pair.owned_values((case.reason_bits, case.defeated_bits)).append(case)
             return True
         else:
             return False
 
+    def remove_case(self, case):
+        """
+        @param case: a case in the case base
+        Removes the case, undoing add_case, with the order and its inconsistencies updated incrementally
+        (see PriorityOrder.remove_case). Raises ValueError when the case is not in the case base.
+        The earliest case equal to case is removed, as list.remove would, from where case_positions says it is,
+        and its place in the list of cases is left empty until the list is next read, so a removal costs the same
+        wherever the case is.
+        """
+        pair = (case.reason_bits, case.defeated_bits)
+        if case not in self.cases_by_pair.get(pair, ()):
+            raise ValueError("The case is not in the case base")
+        self.cases_by_pair.remove_value(pair, case)
+        if self.case_positions is None:
+            self._index_positions()
+        positions = self.case_positions[case]
+        self._cases[positions.popleft()] = None
+        if not positions:
+            del self.case_positions[case]
+        self.removed_count += 1
+        if self.removed_count > len(self._cases) // 2:
+            self._compact()  # so the empty places never take up more than the cases
+        self.order.remove_case(case)
+        self.version += 1
+
+    def _extend_cases(self, cases):
+        if self.case_positions is not None:
+            for index, case in enumerate(cases, len(self._cases)):
+                self.case_positions.setdefault(case, deque()).append(index)
+        self._cases.extend(cases)
+        self.version += len(cases)
+
+    def _index_positions(self):
+        self.case_positions = {}
+        for index, case in enumerate(self._cases):
+            if case is not None:
+                self.case_positions.setdefault(case, deque()).append(index)
+
+    def _compact(self):
+        self._cases = [case for case in self._cases if case is not None]
+        self.removed_count = 0
+        if self.case_positions is not None:
+            self._index_positions()
+
+    def add_case_stream(self, cases, incons="ALL"):
+        """
+        @param cases: iterable of cases, e.g. case_stream.iter_cases reading a file
+        @param incons: the admissibility constraint to add each case with
+        @return: generator of (case, admitted) pairs, each case added as it is read
+        """
+        for case in cases:
+            yield case, self.add_case(case, incons)
 
     def is_cb_consistent(self):
         return self.order.is_cb_consistent()
@@ -45,21 +207,179 @@ class CaseBase:
     def is_consistent_with(self, case):
         return self.order.is_cb_consistent_with(case)
 
+    def check_many(self, cases):
+        """
+        @param cases: list of candidate cases, which are not added
+        @return: list with, for each case, whether the case base would be consistent with it
+                 (as is_consistent_with) and the list of (reason, defeated) frozenset pairs it would be inconsistent with
+        The candidates are checked against the order all at once, see PriorityOrder.get_incons_pairs_many
+        """
+        conflicts = self.order.get_incons_pairs_many([(case.reason_bits, case.defeated_bits) for case in cases])
+        decoded = {}  # the same stored pairs come up for many candidates, so each is decoded once
+        for pairs in conflicts:
+            for pair in pairs:
+                if pair not in decoded:
+                    decoded[pair] = (factor_registry.decode(pair[0]), factor_registry.decode(pair[1]))
+        return [(not pairs, [decoded[pair] for pair in pairs]) for pairs in conflicts]
+
+    def forced_decision(self, facts):
+        """
+        @param facts: the fact situation, an undecided case or an iterable of its pi and delta factors
+        @return: the decision the case base forces in the fact situation, pi when a pi case has a reason which is a
+                 subset of its pi factors and defeated factors which are a superset of its delta factors
+                 (see PriorityOrder.is_existing_claim_bits), likewise delta, and un when neither decision is forced,
+                 or both are as can happen in an inconsistent case base
+        Answers are kept for the FORCED_CACHE_SIZE most recently queried fact situations, until a case is added or
+        removed, or the order changes
+        """
+        if isinstance(facts, Case):
+            pi_bits, delta_bits = facts.pi_bits, facts.delta_bits
+        else:
+            facts = list(facts)
+            pi_bits = factor_registry.encode(f for f in facts if f.polarity == decision_enum.pi)
+            delta_bits = factor_registry.encode(f for f in facts if f.polarity == decision_enum.delta)
+
+        # cases with an empty side are not in the order, but are looked at by _is_forced
+        version = (self.version, self.order.version)
+        if self.forced_cache_version != version:
+            self.forced_cache.clear()
+            self.forced_cache_version = version
+        key = (pi_bits, delta_bits)
+        decision = self.forced_cache.get(key)
+        if decision is not None:
+            self.forced_cache.move_to_end(key)
+            return decision
+
+        pi_forced = self._is_forced(decision_enum.pi, pi_bits, delta_bits)
+        delta_forced = self._is_forced(decision_enum.delta, delta_bits, pi_bits)
+        if pi_forced != delta_forced:
+            decision = decision_enum.pi if pi_forced else decision_enum.delta
+        else:
+            decision = decision_enum.un
+
+        self.forced_cache[key] = decision
+        if len(self.forced_cache) > self.FORCED_CACHE_SIZE:
+            self.forced_cache.popitem(last=False)
+        return decision
+
+    def _is_forced(self, decision, winning_bits, losing_bits):
+        if losing_bits:
+            return self.order.is_existing_claim_bits(winning_bits, losing_bits)
+        # every defeated set is a superset of no factors, which the order's superset queries do not return
+        return any(case.decision == decision and case.reason_bits & ~winning_bits == 0 for case in self.cases)
+
+    def nearest_precedents(self, case, k=1):
+        """
+        @param case: a case with a decision, which need not be in the case base
+        @param k: the number of precedents
+        @return: list of up to k (precedent, difference) pairs, the cases of the case base with the fewest relevant
+                 differences of case from them (see Case.relevant_diff_from) and those differences, nearest first
+        The precedents within a distance of case are found through the defeat index of the order
+        (see PriorityOrder.get_rd_pairs_bits), the distance being widened until there are k of them,
+        rather than case being compared with every case in turn. Cases with an empty side, which have no pair in
+        the order, are compared directly (see PriorityOrder.get_empty_side_rd_pairs_bits)
+        """
+        if case.decision == decision_enum.un:
+            raise ValueError("The case has no decision")
+
+        max_distance = 0
+        while True:
+            found = self._precedents_within(case, max_distance)
+            # every case is found by one of the two searches once the distance is wide enough,
+            # and no relevant difference can have more factors than there are
+            if len(found) >= min(k, len(self)) or max_distance >= len(factor_registry.factors):
+                break
+            max_distance = max(1, 2 * max_distance)
+        found.sort(key=lambda item: item[0])
+        return [(precedent, case.relevant_diff_from(precedent)) for distance, precedent in found[:k]]
+
+    def binding_precedents(self, case):
+        """
+        @param case: a case with a decision, which need not be in the case base
+        @return: list of the cases of the case base case has no relevant difference from.
+                 Those with the decision of case force it, those with the other decision conflict with it
+        """
+        if case.decision == decision_enum.un:
+            raise ValueError("The case has no decision")
+        return [precedent for distance, precedent in self._precedents_within(case, 0)]
+
+    def _precedents_within(self, case, max_distance):
+        # From a case with the same decision the differences are its reason factors missing from the reason
+        # of case and the defeated factors of case missing from its defeated, with the other decision the
+        # reason and defeated of case swap places
+        other_decision = decision_enum.delta if case.decision == decision_enum.pi else decision_enum.pi
+        found = []
+        for decision, reason_bits, defeated_bits in ((case.decision, case.reason_bits, case.defeated_bits),
+                                                     (other_decision, case.defeated_bits, case.reason_bits)):
+            pairs = self.order.get_rd_pairs_bits(reason_bits, defeated_bits, max_distance)
+            pairs += self.order.get_empty_side_rd_pairs_bits(reason_bits, defeated_bits, max_distance, decision)
+            for distance, reason, defeated in pairs:
+                found.extend((distance, precedent) for precedent in self.cases_by_pair.get((reason, defeated), ())
+                             if precedent.decision == decision)
+        return found
+
     def count_tainted_cases(self):
         """
         @return : number of cases which are associated with an inconsistency in current cb
         """
+        # cases are counted as they are tainted, see PriorityOrder.add_order_bits
+        return self.order.tainted_count
 
-        # loop through all cases in order
-        count = 0
-        for case in self.cases:
-            if not self.is_consistent_with(case):
-                count = count + 1
+    def tainted_cases(self):
+        """
+        @return : list of the cases which are associated with an inconsistency in current cb
+        """
+        return [case for pair in self.order.incons_pairs for case in self.cases_by_pair.get(pair, ())]
 
-        return count
+    def conflict_degree(self, case):
+        """
+        @param case: a case in the case base
+        @return: number of cases in the case base which case is inconsistent with, kept up to date as cases are
+                 added and removed (see ConflictGraph)
+        """
+        return self.order.conflicts.case_degree((case.reason_bits, case.defeated_bits))
+
+    def conflict_components(self):
+        """
+        @return: list of the clusters of tainted cases, each the list of cases connected by inconsistencies,
+                 found with the union-find of the conflict graph, largest first
+        """
+        components = [[case for pair in pairs for case in self.cases_by_pair.get(pair, ())]
+                      for pairs in self.order.conflicts.components()]
+        return sorted(components, key=len, reverse=True)
+
+    def conflict_graph(self):
+        """
+        @return: networkx.DiGraph of the tainted cases, with an edge from each case to the later cases which are
+                 inconsistent with it. Identical cases are one node, with the number of them as its 'count'
+        """
+        graph = self.order.conflicts.to_networkx()
+        cases = {pair: self.cases_by_pair.get(pair, ()) for pair in graph.nodes}
+        case_graph = nx.DiGraph()
+        for pair, pair_cases in cases.items():
+            for case in pair_cases:
+                if case in case_graph:
+                    case_graph.nodes[case]["count"] += 1
+                else:
+                    case_graph.add_node(case, count=1)
+        case_graph.add_edges_from((earlier, later) for earlier_pair, later_pair in graph.edges
+                                  for earlier in cases[earlier_pair] for later in cases[later_pair])
+        return case_graph
+
+    def minimal_repair(self, time_budget=None):
+        """
+        @param time_budget: seconds to spend on exact repairs, None for no limit, see ConflictGraph.minimum_cover
+        @return: list of the fewest cases whose removal makes the case base consistent, and whether it is the exact
+                 fewest or, once the time budget is spent, at most twice as many
+        Only the tainted cases of the conflict graph are looked at, a cluster of inconsistent cases at a time,
+        and cases with the same (reason, defeated) pair are removed together, since removing only some of them
+        leaves their inconsistencies.
+        """
+        cover, exact = self.order.conflicts.minimum_cover(time_budget)
+        return [case for pair in cover for case in self.cases_by_pair.get(pair, ())], exact
 
     def metrics(self):
-        size = len(self.cases)
+        size = len(self)
         inconsistencies = self.count_tainted_cases()
         max_edges_pi, max_edges_delta = self.order.PD.max_edges()
         print("Number of cases: ", size)
@@ -70,6 +390,12 @@ class CaseBase:
         print(f"Factors for delta: {len(self.order.PD.factor_list[decision_enum.delta])}")
         return size, inconsistencies
 
+    def __len__(self):
+        """
+        @return: number of cases, without compacting the list of cases
+        """
+        return len(self._cases) - self.removed_count
+
     def __str__(self):
         """
         @return: String representation of the CaseBase for human-readable output
@@ -0,0 +1,132 @@
+import json
+from pathlib import Path
+
+import yaml
+
+from briefcase.case import Case
+
+"""
+Streaming readers and writers for cases in the dictionary schema of Case.from_dict, from YAML files
+holding a list of cases, or JSON Lines files holding one case per line.
+Cases are yielded one at a time as the file is read, so files larger than memory can be fed to a CaseBase.
+"""
+
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+
+
+def default_loader():
+    """
+    @return: the libyaml safe loader when pyyaml was built with it, otherwise the pure python one
+    """
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def iter_yaml_dicts(stream, loader=None):
+    """
+    @param stream: a text or binary stream of a YAML document which is a list
+    @param loader: the yaml loader class, default_loader() by default
+    @return: generator of the items of the list, each built as soon as its events have been parsed
+    """
+    loader = (loader or default_loader())(stream)
+    try:
+        loader.get_event()  # stream start
+        if loader.check_event(yaml.StreamEndEvent):
+            return
+        loader.get_event()  # document start
+        if loader.check_event(yaml.ScalarEvent):  # empty document
+            return
+        if not loader.check_event(yaml.SequenceStartEvent):
+            raise ValueError("Expected the YAML document to be a list of cases")
+        loader.get_event()
+
+        anchors = {}
+        while not loader.check_event(yaml.SequenceEndEvent):
+            yield loader.construct_document(_compose_node(loader, anchors))
+    finally:
+        loader.dispose()
+
+
+def _compose_node(loader, anchors):
+    """
+    Composes the next node from the event stream, as yaml.composer.Composer does.
+    The C loader does not expose compose_node, so this works from the events which both loaders give.
+    """
+    event = loader.get_event()
+    if isinstance(event, yaml.AliasEvent):
+        return anchors[event.anchor]
+
+    if isinstance(event, yaml.ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+        node = yaml.ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+    elif isinstance(event, yaml.SequenceStartEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.SequenceNode, None, event.implicit)
+        node = yaml.SequenceNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+        if event.anchor is not None:
+            anchors[event.anchor] = node
+        while not loader.check_event(yaml.SequenceEndEvent):
+            node.value.append(_compose_node(loader, anchors))
+        node.end_mark = loader.get_event().end_mark
+    elif isinstance(event, yaml.MappingStartEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.MappingNode, None, event.implicit)
+        node = yaml.MappingNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+        if event.anchor is not None:
+            anchors[event.anchor] = node
+        while not loader.check_event(yaml.MappingEndEvent):
+            key = _compose_node(loader, anchors)
+            node.value.append((key, _compose_node(loader, anchors)))
+        node.end_mark = loader.get_event().end_mark
+    else:
+        raise ValueError(f"Unexpected YAML event {event}")
+
+    if event.anchor is not None:
+        anchors[event.anchor] = node
+    return node
+
+
+def iter_jsonl_dicts(stream):
+    """
+    @param stream: a text stream with one JSON object per line
+    @return: generator of the objects, skipping blank lines
+    """
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_cases(path, loader=None):
+    """
+    @param path: a YAML file holding a list of cases, or a JSON Lines file (.jsonl, .ndjson) of cases
+    @param loader: the yaml loader class for YAML files, default_loader() by default
+    @return: generator of the cases in the file, read one at a time
+    """
+    path = Path(path)
+    if path.suffix in JSONL_SUFFIXES:
+        with open(path, "r") as file:
+            for dic in iter_jsonl_dicts(file):
+                yield Case.from_dict(dic)
+    else:
+        with open(path, "rb") as file:
+            for dic in iter_yaml_dicts(file, loader):
+                yield Case.from_dict(dic)
+
+
+def write_cases(cases, path):
+    """
+    @param cases: iterable of cases, written one at a time
+    @param path: a YAML file, or a JSON Lines file (.jsonl, .ndjson), to write the cases to
+    """
+    path = Path(path)
+    dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    with open(path, "w") as file:
+        for case in cases:
+            if path.suffix in JSONL_SUFFIXES:
+                file.write(json.dumps(case.to_dict()) + "\n")
+            else:
+                # a list of one case per dump, which concatenate into a single list
+                file.write(yaml.dump([case.to_dict()], Dumper=dumper, default_flow_style=False))
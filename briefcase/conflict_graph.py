@@ -0,0 +1,242 @@
+import time
+
+import networkx as nx
+
+from briefcase.cow_dict import CowDict
+from briefcase.enums import decision_enum
+from briefcase.factor_registry import factor_registry
+
+"""
+Graph of the inconsistencies between the (reason, defeated) pairs of a priority order, kept up to date as pairs are
+added and removed, so clusters of mutually inconsistent cases can be found without checking consistency again.
+"""
+
+
+class ConflictGraph:
+    """
+    The inconsistent pairs of a priority order as a graph, with an edge from each pair to the later pairs which
+    were found inconsistent with it when they were added
+    e.g. with (p1; d1) added, then (d1; p1) and (d1, d2; p1)
+    successors[(p1; d1)] = {(d1; p1), (d1, d2; p1)}, predecessors[(d1; p1)] = {(p1; d1)}
+    The number of cases on the pairs each pair is inconsistent with is kept with the pair_counts of the order,
+    and the connected components with a union-find, which is rebuilt after pairs are removed.
+    """
+
+    def __init__(self, pair_counts):
+        """
+        @param pair_counts: the number of cases of each pair, the pair_counts of the priority order
+        """
+        self.pair_counts = pair_counts
+        self.successors = CowDict(set)
+        self.predecessors = CowDict(set)
+        self.case_degrees = {}  # pair -> number of cases on the pairs it is inconsistent with
+        self.parents = {}  # union-find forest over the pairs with an edge
+        self.stale = False  # whether a pair was removed since the union-find was built
+
+    def __len__(self):
+        return len(self.case_degrees)
+
+    def __contains__(self, pair):
+        return pair in self.case_degrees
+
+    def fork(self, pair_counts):
+        """
+        @param pair_counts: the pair_counts of the forked priority order
+        @return: a copy of the graph sharing its adjacency sets, see CowDict
+        """
+        graph = ConflictGraph.__new__(ConflictGraph)
+        graph.pair_counts = pair_counts
+        graph.successors = self.successors.fork()
+        graph.predecessors = self.predecessors.fork()
+        graph.case_degrees = dict(self.case_degrees)
+        graph.parents = dict(self.parents)
+        graph.stale = self.stale
+        return graph
+
+    def add_edges(self, earliers, later):
+        """
+        @param earliers: (reason, defeated) bitset pairs of the order
+        @param later: a pair inconsistent with each of them, added after them
+        """
+        predecessors = self.predecessors.owned_values(later)
+        pair_counts = self.pair_counts
+        later_count = pair_counts.get(later, 0)
+        later_degree = self.case_degrees.get(later, 0)
+        for earlier in earliers:
+            if earlier in predecessors:
+                continue
+            predecessors.add(earlier)
+            self.successors.owned_values(earlier).add(later)
+            self.case_degrees[earlier] = self.case_degrees.get(earlier, 0) + later_count
+            later_degree += pair_counts.get(earlier, 0)
+        self.case_degrees[later] = later_degree
+        if not self.stale:
+            for earlier in earliers:
+                self._union(earlier, later)
+
+    def count_cases(self, pair, count):
+        """
+        @param pair: a pair of the order whose number of cases changed
+        @param count: the change in its number of cases
+        """
+        for neighbour in self.neighbours(pair):
+            self.case_degrees[neighbour] += count
+
+    def remove_pair(self, pair):
+        """
+        @param pair: a pair removed from the order, with its edges
+        """
+        if pair not in self.case_degrees:
+            return
+        count = self.pair_counts.get(pair, 0)
+        for later in self.successors.pop(pair, ()):
+            self.predecessors.remove_value(later, pair)
+            self._drop_degree(later, count)
+        for earlier in self.predecessors.pop(pair, ()):
+            self.successors.remove_value(earlier, pair)
+            self._drop_degree(earlier, count)
+        self.successors.owned.discard(pair)
+        self.predecessors.owned.discard(pair)
+        del self.case_degrees[pair]
+        self.stale = True
+
+    def _drop_degree(self, pair, count):
+        if self.successors.get(pair) or self.predecessors.get(pair):
+            self.case_degrees[pair] -= count
+        else:
+            del self.case_degrees[pair]  # no edges left
+
+    def neighbours(self, pair):
+        """
+        @param pair: a pair of the order
+        @return: set of the pairs it is inconsistent with
+        """
+        return self.successors.get(pair, set()) | self.predecessors.get(pair, set())
+
+    def degree(self, pair):
+        """
+        @param pair: a pair of the order
+        @return: number of pairs it is inconsistent with
+        """
+        return len(self.successors.get(pair, ())) + len(self.predecessors.get(pair, ()))
+
+    def case_degree(self, pair):
+        """
+        @param pair: a pair of the order
+        @return: number of cases on the pairs it is inconsistent with
+        """
+        return self.case_degrees.get(pair, 0)
+
+    def find(self, pair):
+        """
+        @param pair: a pair with an edge
+        @return: the representative pair of its connected component
+        """
+        if self.stale:
+            self._rebuild()
+        root = pair
+        while self.parents[root] != root:
+            root = self.parents[root]
+        while self.parents[pair] != root:  # path compression
+            self.parents[pair], pair = root, self.parents[pair]
+        return root
+
+    def components(self):
+        """
+        @return: list of the sets of pairs of each connected component, largest first
+        """
+        if self.stale:
+            self._rebuild()
+        components = {}
+        for pair in self.case_degrees:
+            components.setdefault(self.find(pair), set()).add(pair)
+        return sorted(components.values(), key=len, reverse=True)
+
+    def to_networkx(self, decode=False):
+        """
+        @param decode: whether the nodes are (reason, defeated) frozenset pairs rather than bitset pairs
+        @return: networkx.DiGraph of the pairs with an edge, with their number of 'cases' and their edges
+        """
+        def node(pair):
+            return (factor_registry.decode(pair[0]), factor_registry.decode(pair[1])) if decode else pair
+
+        graph = nx.DiGraph()
+        for pair in self.case_degrees:
+            graph.add_node(node(pair), cases=self.pair_counts.get(pair, 0))
+        graph.add_edges_from((node(earlier), node(later))
+                             for earlier, laters in self.successors.items() for later in laters)
+        return graph
+
+    def minimum_cover(self, time_budget=None):
+        """
+        @param time_budget: seconds to spend on exact covers, None for no limit
+        @return: the set of pairs of a cover of the graph, every edge having one of its pairs in it, with the fewest
+                 cases on its pairs, and whether it is the exact minimum
+        Every edge joins a pi pair to a delta pair, so each component is bipartite and its minimum weighted cover
+        is exact from a minimum cut (see _exact_cover). Components are covered smallest first, and those left once
+        the time budget is spent get the local ratio cover, at most twice the minimum (see _approximate_cover).
+        The budget is checked between components, so a large component can take it over.
+        """
+        start = time.perf_counter()
+        cover, exact = set(), True
+        for pairs in sorted(self.components(), key=len):
+            if time_budget is None or time.perf_counter() - start < time_budget:
+                cover |= self._exact_cover(pairs)
+            else:
+                cover |= self._approximate_cover(pairs)
+                exact = False
+        return cover, exact
+
+    def _edges(self, pairs):
+        return [(earlier, later) for earlier in pairs for later in self.successors.get(earlier, ())]
+
+    def _exact_cover(self, pairs):
+        # source -> pi pair -> delta pair -> sink, the capacities into the sink and out of the source being the
+        # number of cases, and the edges between pairs uncut. The cover is the pairs cut from their end of the flow.
+        network = nx.DiGraph()
+        for pair in pairs:
+            if _reason_polarity(pair) == decision_enum.pi:
+                network.add_edge("source", pair, capacity=self.pair_counts.get(pair, 0))
+            else:
+                network.add_edge(pair, "sink", capacity=self.pair_counts.get(pair, 0))
+        for a, b in self._edges(pairs):
+            network.add_edge(*((a, b) if _reason_polarity(a) == decision_enum.pi else (b, a)))
+        cut_value, (source_side, sink_side) = nx.minimum_cut(network, "source", "sink")
+        return {pair for pair in pairs if (pair in sink_side) == (_reason_polarity(pair) == decision_enum.pi)}
+
+    def _approximate_cover(self, pairs):
+        # local ratio: each edge takes the smaller remaining weight of its two pairs off both, and the pairs left
+        # with no weight cover every edge. Pairs whose neighbours are all in the cover are then dropped from it.
+        remaining = {pair: self.pair_counts.get(pair, 0) for pair in pairs}
+        for a, b in self._edges(pairs):
+            paid = min(remaining[a], remaining[b])
+            remaining[a] -= paid
+            remaining[b] -= paid
+        cover = {pair for pair, weight in remaining.items() if weight == 0}
+        for pair in sorted(cover, key=lambda pair: self.pair_counts.get(pair, 0), reverse=True):
+            if self.neighbours(pair) <= cover:
+                cover.discard(pair)
+        return cover
+
+    def _union(self, a, b):
+        self.parents.setdefault(a, a)
+        self.parents.setdefault(b, b)
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parents[root_b] = root_a
+
+    def _rebuild(self):
+        self.stale = False
+        self.parents = {}
+        for earlier, laters in self.successors.items():
+            for later in laters:
+                self._union(earlier, later)
+
+
+def _reason_polarity(pair):
+    reason, defeated = pair
+    if reason:
+        return factor_registry.factors[(reason & -reason).bit_length() - 1].polarity
+    # a pair with an empty reason, which only an order with empty sides has
+    defeated_polarity = factor_registry.factors[(defeated & -defeated).bit_length() - 1].polarity
+    return decision_enum.delta if defeated_polarity == decision_enum.pi else decision_enum.pi
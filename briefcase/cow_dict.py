@@ -0,0 +1,53 @@
+class CowDict(dict):
+    """
+    Dictionary of sets (or lists) which can be forked cheaply.
+    A fork copies the dictionary but shares its sets with the original, and whichever of the two next writes to a
+    shared set copies it first, so a fork costs a copy of the keys rather than of every set.
+    Reads behave as a defaultdict of the factory, writes go through owned_values.
+    e.g. index.owned_values(key).add(value) rather than index[key].add(value)
+    """
+
+    def __init__(self, factory=set, items=()):
+        """
+        @param factory: the type of the values, set or list
+        @param items: initial mapping of keys to values, which are shared rather than copied
+        """
+        super().__init__(items)
+        self.factory = factory
+        self.owned = set()  # keys whose values are not shared with a fork
+
+    def __missing__(self, key):
+        values = self[key] = self.factory()
+        self.owned.add(key)
+        return values
+
+    def owned_values(self, key):
+        """
+        @param key: key to write to
+        @return: the values of key, copied first if they are shared with a fork, to be modified in place
+        """
+        if key not in self.owned:
+            self[key] = self.factory(self.get(key, ()))
+            self.owned.add(key)
+        return self[key]
+
+    def remove_value(self, key, value):
+        """
+        @param key: key to remove a value from
+        @param value: the value to remove
+        @return: True when key has no values left, and has been deleted
+        """
+        values = self.owned_values(key)
+        values.remove(value)
+        if values:
+            return False
+        del self[key]
+        self.owned.discard(key)
+        return True
+
+    def fork(self):
+        """
+        @return: a copy of the dictionary sharing its values, neither dictionary sees the other's later writes
+        """
+        self.owned = set()
+        return CowDict(self.factory, self)
@@ -0,0 +1,156 @@
+from briefcase.factor_registry import iter_bits
+
+
+class DefeatIndex:
+    """
+    Bitset-partitioned inverted index over the defeated sets of a priority order, for superset and subset queries.
+    Each defeated bitset gets a slot, and each factor has a mask of the slots whose defeated set contains it.
+    e.g. slots 0: {d1, d3}, 1: {d1, d2}, 2: {d4}
+         d1 -> 0b011, d2 -> 0b010, d3 -> 0b001, d4 -> 0b100
+    Supersets of {d1} are the slots in the mask of every factor of the query: d1 = 0b011
+    Subsets of {d1, d2, d3} are the slots in no mask of a factor outside the query: ~d4 = 0b011
+    The slots are partitioned into blocks, so adding a defeated set only touches the masks of one block.
+    """
+
+    BLOCK_SIZE = 4096
+
+    def __init__(self):
+        self.defeats = []  # slot -> defeated bitset
+        self.slots = {}  # defeated bitset -> slot
+        self.blocks = []  # per block, the mask of used slots and a dict of factor bit -> mask of slots
+        self.free_slots = []  # slots of removed defeated sets, reused first
+        self.shared_blocks = set()  # numbers of the blocks shared with a fork, copied before they are written to
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, defeated):
+        return defeated in self.slots
+
+    def add(self, defeated):
+        """
+        @param defeated: a defeated bitset, added to the index if it is not already in it
+        """
+        if defeated in self.slots:
+            return
+
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.defeats[slot] = defeated
+        else:
+            slot = len(self.defeats)
+            self.defeats.append(defeated)
+        self.slots[defeated] = slot
+
+        block_number, offset = divmod(slot, self.BLOCK_SIZE)
+        if block_number == len(self.blocks):
+            self.blocks.append([0, {}])
+        block = self._owned_block(block_number)
+        slot_bit = 1 << offset
+        block[0] |= slot_bit
+        factor_slots = block[1]
+        for position in iter_bits(defeated):
+            factor_slots[position] = factor_slots.get(position, 0) | slot_bit
+
+    def remove(self, defeated):
+        """
+        @param defeated: a defeated bitset, removed from the index if it is in it, its slot is reused by the next add
+        """
+        slot = self.slots.pop(defeated, None)
+        if slot is None:
+            return
+
+        self.defeats[slot] = None
+        self.free_slots.append(slot)
+        block_number, offset = divmod(slot, self.BLOCK_SIZE)
+        block = self._owned_block(block_number)
+        slot_bit = 1 << offset
+        block[0] &= ~slot_bit
+        factor_slots = block[1]
+        for position in iter_bits(defeated):
+            slots = factor_slots[position] & ~slot_bit
+            if slots:
+                factor_slots[position] = slots
+            else:
+                del factor_slots[position]
+
+    def _owned_block(self, block_number):
+        if block_number in self.shared_blocks:
+            used, factor_slots = self.blocks[block_number]
+            self.blocks[block_number] = [used, dict(factor_slots)]
+            self.shared_blocks.discard(block_number)
+        return self.blocks[block_number]
+
+    def fork(self):
+        """
+        @return: a copy of the index sharing its blocks, each block is copied by whichever of the two indexes
+                 writes to it first
+        """
+        index = DefeatIndex()
+        index.defeats = list(self.defeats)
+        index.slots = dict(self.slots)
+        index.free_slots = list(self.free_slots)
+        index.blocks = list(self.blocks)
+        index.shared_blocks = set(range(len(self.blocks)))
+        self.shared_blocks = set(range(len(self.blocks)))
+        return index
+
+    def supersets(self, bits):
+        """
+        @param bits: bitset of factors
+        @return: list of the defeated bitsets in the index which are supersets of bits
+        """
+        positions = list(iter_bits(bits))
+        result = []
+        for block_number, (used, factor_slots) in enumerate(self.blocks):
+            mask = used
+            for position in positions:
+                mask &= factor_slots.get(position, 0)
+                if not mask:
+                    break
+            self._collect(block_number, mask, result)
+        return result
+
+    def subsets(self, bits):
+        """
+        @param bits: bitset of factors
+        @return: list of the defeated bitsets in the index which are subsets of bits
+        """
+        result = []
+        for block_number, (used, factor_slots) in enumerate(self.blocks):
+            mask = used
+            for position, slots in factor_slots.items():
+                if not bits >> position & 1:
+                    mask &= ~slots
+                    if not mask:
+                        break
+            self._collect(block_number, mask, result)
+        return result
+
+    def near_supersets(self, bits, max_missing):
+        """
+        @param bits: bitset of factors
+        @param max_missing: the most factors of bits a defeated set can be missing
+        @return: list of (defeated, missing) of the defeated bitsets in the index which are missing at most
+                 max_missing of the factors of bits, with the number missing
+        """
+        # The count of missing factors of each slot is kept bit-sliced over the slot masks:
+        # at_least[k] is the mask of the slots missing at least k of the factors seen so far
+        positions = list(iter_bits(bits))
+        result = []
+        for block_number, (used, factor_slots) in enumerate(self.blocks):
+            at_least = [used] + [0] * (max_missing + 1)
+            for position in positions:
+                missing = used & ~factor_slots.get(position, 0)
+                for k in range(max_missing + 1, 0, -1):
+                    at_least[k] |= at_least[k - 1] & missing
+                if at_least[max_missing + 1] == used:
+                    break  # every slot is missing too many
+            base = block_number * self.BLOCK_SIZE
+            for k in range(max_missing + 1):
+                result.extend((self.defeats[base + offset], k) for offset in iter_bits(at_least[k] & ~at_least[k + 1]))
+        return result
+
+    def _collect(self, block_number, mask, result):
+        base = block_number * self.BLOCK_SIZE
+        result.extend(self.defeats[base + offset] for offset in iter_bits(mask))
@@ -1,5 +1,6 @@
 from enum import Enum
 
-decision_enum = Enum("Decision", ["pi", "delta", "un"])
+# module and qualname point pickle at the module attributes, so enum members can be sent between processes
+decision_enum = Enum("Decision", ["pi", "delta", "un"], module=__name__, qualname="decision_enum")
 incons_enum = Enum("Inconsistency", ["NO", "NO_NEW", "NO_INVOLVEMENT", "HORTY", "NO_CORRUPTION",
-                                                  "MRD", "ALL"])
+                                                  "MRD", "ALL"], module=__name__, qualname="incons_enum")
@@ -0,0 +1,194 @@
+import math
+import os
+import random
+import statistics
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from briefcase.binary_format import CaseFile, pack_cases
+from briefcase.case_base import CaseBase
+from briefcase.enums import decision_enum
+
+"""
+Engine for repeated admissibility trials, where each trial adds the cases of a base one at a time, in its own order,
+until the first case which is not admissible.
+The cases are packed once into shared memory and every worker process unpacks them from there, so a trial is sent to
+a worker as a list of case indices rather than a list of pickled cases.
+Results are returned in trial order, so they are the same whatever the number of workers.
+"""
+
+# the cases unpacked from shared memory by each worker process
+_worker_cases = None
+
+
+def shuffle_orders(n_cases, repeats=51, seed=42):
+    """
+    @param n_cases: number of cases to order
+    @param repeats: number of orders
+    @param seed: random seed
+    @return: list of random orders of the case indices, the same orders shuffle_data would put the cases in
+    """
+    rng = random.Random(seed)
+    orders = []
+    for _ in range(repeats):
+        order = list(range(n_cases))
+        rng.shuffle(order)
+        orders.append(order)
+    return orders
+
+
+def balanced_orders(decisions, repeats=50, seed=42):
+    """
+    @param decisions: the decision of each case
+    @param repeats: number of orders
+    @param seed: random seed
+    @return: list of orders of case indices alternating pi and delta cases, sampled as balanced_shuffle_data does
+    """
+    rng = random.Random(seed)
+    pi_indices = [i for i, decision in enumerate(decisions) if decision == decision_enum.pi]
+    delta_indices = [i for i, decision in enumerate(decisions) if decision != decision_enum.pi]
+    min_data = min(len(pi_indices), len(delta_indices))
+    orders = []
+    for _ in range(repeats):
+        pi_samples = rng.sample(pi_indices, math.ceil(min_data / 2))
+        delta_samples = rng.sample(delta_indices, min_data // 2)
+        order = [i for pair in zip(pi_samples, delta_samples) for i in pair]
+        if min_data % 2 == 1:
+            order.append(pi_samples[-1])
+        orders.append(order)
+    return orders
+
+
+def admissibility_trial(cases, order, incons="NO"):
+    """
+    @param cases: list of cases
+    @param order: the indices of the cases in the order they are added
+    @param incons: the admissibility constraint, a name of incons_enum
+    @return: dictionary of the trial's
+             'score', the number of cases admitted before the first which was not, or all of them,
+             'power', the power of the case base at that point,
+             'size', the number of cases in the order,
+             'pi_factors' and 'delta_factors', counts of the factor names of the first case not admitted
+             on each side of its reason and defeated factors
+    """
+    cb = CaseBase([])
+    score = len(order)
+    pi_factors, delta_factors = Counter(), Counter()
+    for i, index in enumerate(order):
+        case = cases[index]
+        if not cb.add_case(case, incons):
+            score = i
+            winning, losing = (pi_factors, delta_factors) if case.decision == decision_enum.pi \
+                else (delta_factors, pi_factors)
+            winning.update(factor.name for factor in case.reason)
+            losing.update(factor.name for factor in case.defeated)
+            break
+    return {
+        "score": score,
+        "power": cb.order.PD.cb_power(),
+        "size": len(order),
+        # sorted, since set order can differ once the cases are unpacked in another process
+        "pi_factors": dict(sorted(pi_factors.items())),
+        "delta_factors": dict(sorted(delta_factors.items())),
+    }
+
+
+def admit_by_constraint(cases, order, constraints):
+    """
+    @param cases: list of cases
+    @param order: the indices of the cases in the order they are added
+    @param constraints: names of incons_enum to add the cases under
+    @return: dictionary of each constraint to the CaseBase of the cases admitted under it, in order,
+             as CaseBase.add_cases would give for that constraint alone
+    The constraints share one case base while they agree on which cases to admit, and it is forked when they
+    disagree, so constraints which mostly agree cost little more than one of them.
+    """
+    groups = [(CaseBase([]), list(constraints))]
+    for index in order:
+        case = cases[index]
+        split_groups = []
+        for cb, group in groups:
+            admitted = [incons for incons in group if cb.order.admissibility_constraints.is_case_admissible_bits(
+                case.reason_bits, case.defeated_bits, cb.check_incons_value(incons))]
+            rejected = [incons for incons in group if incons not in admitted]
+            if admitted and rejected:
+                split_groups.append((cb.fork(), rejected))
+            elif rejected:
+                split_groups.append((cb, rejected))
+            if admitted:
+                cb.add_case(case, "ALL")  # already known to be admissible under the group's constraints
+                split_groups.append((cb, admitted))
+        groups = split_groups
+    return {incons: cb for cb, group in groups for incons in group}
+
+
+def run_admissibility_trials(shuffles, incons="NO", workers=None):
+    """
+    @param shuffles: list of trials, each a list of cases in the order they are added
+    @param incons: the admissibility constraint, a name of incons_enum
+    @param workers: number of worker processes, os.cpu_count() by default, 1 runs the trials in this process
+    @return: TrialResults of the trials, in the order of shuffles
+    """
+    # the trials usually share their cases, so each distinct case is packed once
+    index = {}
+    orders = [[index.setdefault(case, len(index)) for case in shuffle] for shuffle in shuffles]
+    cases = list(index)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(orders) <= 1:
+        return TrialResults([admissibility_trial(cases, order, incons) for order in orders])
+
+    factors, body = pack_cases(cases)
+    block = shared_memory.SharedMemory(create=True, size=max(len(body), 1))
+    try:
+        block.buf[:len(body)] = body
+        with ProcessPoolExecutor(max_workers=min(workers, len(orders)), initializer=_attach_cases,
+                                 initargs=(block.name, factors, len(cases))) as executor:
+            # map returns results in the order of the trials, whichever worker finishes first
+            chunksize = max(1, len(orders) // (4 * workers))
+            results = list(executor.map(_run_trial, orders, [incons] * len(orders), chunksize=chunksize))
+    finally:
+        block.close()
+        block.unlink()
+    return TrialResults(results)
+
+
+def _attach_cases(name, factors, n_cases):
+    global _worker_cases
+    # workers share the parent's resource tracker, so the parent unlinking the block is all the clean up needed
+    block = shared_memory.SharedMemory(name=name)
+    _worker_cases = list(CaseFile.from_buffer(block.buf, factors, n_cases))
+    block.close()
+
+
+def _run_trial(order, incons):
+    return admissibility_trial(_worker_cases, order, incons)
+
+
+class TrialResults:
+    """
+    Results of a run of admissibility trials, a list per measure with an entry per trial
+    """
+
+    def __init__(self, results):
+        self.scores = [result["score"] for result in results]
+        self.powers = [result["power"] for result in results]
+        self.sizes = [result["size"] for result in results]
+        self.pi_factors = [result["pi_factors"] for result in results]
+        self.delta_factors = [result["delta_factors"] for result in results]
+
+    def avg(self):
+        """
+        @return: the mean score, rounded
+        """
+        return round(sum(self.scores) / len(self.scores))
+
+    def std_dev(self):
+        """
+        @return: the sample standard deviation of the scores, to 2 decimal places
+        """
+        return round(statistics.stdev(self.scores), 2)
+
+    def __len__(self):
+        return len(self.scores)
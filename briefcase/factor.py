@@ -1,21 +1,48 @@
 class Factor:
     """Class describing a factor which contributes to a decision
     e.g. factor 1, name = "child ate their dinner", polarity = pi (child can have dessert)
+
+    Factors are immutable and interned, creating a factor with the same name and polarity
+    gives back the same instance, with its hash computed once.
     """
 
-    def __init__(self, name, polarity="un"):
+    __slots__ = ("name", "polarity", "_hash")
+    _interned = {}
+
+    def __new__(cls, name, polarity="un"):
         """
         @param name: name of the given factor
         @param polarity: the result of the decision (pi/delta/undecided)
         """
-        self.name = name
-        self.polarity = polarity
+        try:
+            return cls._interned[(name, polarity)]
+        except KeyError:
+            factor = super().__new__(cls)
+            object.__setattr__(factor, "name", name)
+            object.__setattr__(factor, "polarity", polarity)
+            object.__setattr__(factor, "_hash", hash(name + str(polarity)))
+            cls._interned[(name, polarity)] = factor
+            return factor
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Factor is immutable")
+
+    def __delattr__(self, key):
+        raise AttributeError("Factor is immutable")
+
+    def __reduce__(self):
+        """
+        @return: recreate through the constructor, so unpickled factors are interned too
+        """
+        return Factor, (self.name, self.polarity)
 
     def __eq__(self, other):
         """
         @param other: second factor, to compare instance factor to
         @return: override equality return based on factor name and factor polarity
         """
+        if self is other:
+            return True
         if type(other) is type(self):
             return self.name == other.name and self.polarity == other.polarity
         else:
@@ -23,9 +50,9 @@ class Factor:
 
     def __hash__(self):
         """
-        @return: override hash of factor based on factor name and factor polarity
+        @return: override hash of factor based on factor name and factor polarity, computed on creation
         """
-        return hash(self.name + str(self.polarity))
+        return self._hash
 
     def __str__(self):
         """
@@ -0,0 +1,58 @@
+class FactorRegistry:
+    """
+    Interns factors to bit positions, so that a set of factors can be stored as a python int.
+    e.g. with Factor(p1, pi) -> 0 and Factor(p3, pi) -> 1, the set {p1, p3} is stored as 0b11
+    Subset checks between two encoded sets a, b then become a & ~b == 0
+    """
+
+    def __init__(self):
+        self.factors = []
+        self.bits = {}
+
+    def bit(self, factor):
+        """
+        @param factor: a factor
+        @return: the bit position of the factor, registering the factor if it has not been seen before
+        """
+        try:
+            return self.bits[factor]
+        except KeyError:
+            position = len(self.factors)
+            self.bits[factor] = position
+            self.factors.append(factor)
+            return position
+
+    def encode(self, factors):
+        """
+        @param factors: an iterable of factors
+        @return: an int with the bits of all the factors set
+        """
+        bits = 0
+        for factor in factors:
+            bits |= 1 << self.bit(factor)
+        return bits
+
+    def decode(self, bits):
+        """
+        @param bits: an int encoded with this registry
+        @return: a frozenset of the factors with their bits set
+        """
+        return frozenset(self.factors[position] for position in iter_bits(bits))
+
+    def __len__(self):
+        return len(self.factors)
+
+
+# every case and priority order shares the one registry, so encoded sets can be compared across case bases
+factor_registry = FactorRegistry()
+
+
+def iter_bits(bits):
+    """
+    @param bits: an int encoded with a FactorRegistry
+    @return: generator over the positions of the set bits, lowest first
+    """
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
@@ -0,0 +1,165 @@
+import functools
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from briefcase.admissibility_constraints import AdmissibilityConstraints
+from briefcase.factor_registry import factor_registry, iter_bits
+from briefcase.priority_order import PriorityOrder
+
+"""
+Opt-in counters and timers for the hot paths of PriorityOrder and AdmissibilityConstraints.
+While instrumentation is enabled the methods below are replaced on their classes by wrappers which count and time
+their calls, and the superset queries also record the posting set they walk and the size of their results, with
+the factor whose posting set was walked, so a factor causing a large fan-out can be found.
+When it is disabled the original methods are put back, so it costs nothing.
+e.g.
+with instrumentation.collect():
+    cb.add_cases(cases, "NO")
+print(instrumentation.snapshot())
+Times include the time of the instrumented methods called within, e.g. is_consistent_bits includes
+get_stronger_defeats_bits.
+"""
+
+# methods which are counted and timed
+TIMED_METHODS = {
+    PriorityOrder: ("get_stronger_defeats", "get_stronger_defeats_bits", "is_consistent", "is_consistent_bits",
+                    "is_cb_consistent", "get_incons_pairs_with_case", "get_incons_pairs_bits"),
+    AdmissibilityConstraints: ("is_case_admissible_bits", "no_incons_bits", "no_involvement_incons_bits",
+                               "no_new_incons_bits", "horty_incons_bits", "no_corruption_incons_bits", "mrd_bits"),
+}
+
+
+class Instrumentation:
+    """
+    Counts, times and sizes of the instrumented calls since the last reset
+    e.g. calls["is_consistent_bits"] = {"calls": 3, "total_time": 0.0002, "max_time": 0.0001}
+         sizes["get_stronger_defeats_bits.posting"] = {"count": 3, "total": 12, "max": 7}
+         fan_out[Factor(d1, delta)] = 9, the posting set sizes walked for d1
+    """
+
+    def __init__(self):
+        self.originals = {}  # (class, method name) -> the method replaced while enabled
+        self.reset()
+
+    @property
+    def enabled(self):
+        return bool(self.originals)
+
+    def reset(self):
+        """
+        Clears the counts, times and sizes
+        """
+        self.calls = defaultdict(lambda: {"calls": 0, "total_time": 0.0, "max_time": 0.0})
+        self.sizes = defaultdict(lambda: {"count": 0, "total": 0, "max": 0})
+        self.fan_out = Counter()
+
+    def enable(self):
+        """
+        Replaces the instrumented methods with wrappers which record their calls, if they are not already
+        """
+        if self.enabled:
+            return
+        for cls, names in TIMED_METHODS.items():
+            for name in names:
+                original = cls.__dict__[name]
+                self.originals[(cls, name)] = original
+                setattr(cls, name, self._wrap(name, original))
+
+    def disable(self):
+        """
+        Puts back the original methods, what was recorded is kept until reset
+        """
+        for (cls, name), original in self.originals.items():
+            setattr(cls, name, original)
+        self.originals = {}
+
+    @contextmanager
+    def collect(self, reset=True):
+        """
+        @param reset: whether to clear what was recorded before
+        @return: context manager recording the instrumented calls within it, and leaving instrumentation as it was
+                 after it
+        """
+        was_enabled = self.enabled
+        if reset:
+            self.reset()
+        self.enable()
+        try:
+            yield self
+        finally:
+            if not was_enabled:
+                self.disable()
+
+    def snapshot(self):
+        """
+        @return: dictionary of copies of the 'calls', 'sizes' and 'fan_out' recorded, with the mean time of each
+                 method and the mean of each size, and fan_out keyed by the str of each factor, largest first
+        """
+        calls = {name: {**stats, "mean_time": stats["total_time"] / stats["calls"]}
+                 for name, stats in self.calls.items()}
+        sizes = {name: {**stats, "mean": stats["total"] / stats["count"]} for name, stats in self.sizes.items()}
+        fan_out = {str(factor): walked for factor, walked in self.fan_out.most_common()}
+        return {"calls": calls, "sizes": sizes, "fan_out": fan_out}
+
+    def record_size(self, name, size):
+        stats = self.sizes[name]
+        stats["count"] += 1
+        stats["total"] += size
+        stats["max"] = max(stats["max"], size)
+
+    def _wrap(self, name, method):
+        record_sizes = SIZE_RECORDERS.get(name)
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = method(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+
+            stats = self.calls[name]
+            stats["calls"] += 1
+            stats["total_time"] += elapsed
+            stats["max_time"] = max(stats["max_time"], elapsed)
+            if record_sizes:
+                record_sizes(self, name, args, result)
+            return result
+
+        return wrapper
+
+
+def _record_posting_bits(instrumentation, name, args, result):
+    # the superset query walks the smallest posting set of the factors of the query, see get_stronger_defeats_bits
+    order, bits = args[0], args[1]
+    postings = [(len(order.defeated_bits_index.get(position, ())), position) for position in iter_bits(bits)]
+    if postings:
+        walked, position = min(postings)
+        instrumentation.record_size(f"{name}.posting", walked)
+        instrumentation.fan_out[factor_registry.factors[position]] += walked
+    instrumentation.record_size(f"{name}.result", len(result))
+
+
+def _record_posting(instrumentation, name, args, result):
+    order, factor_set = args[0], args[1]
+    postings = [(len(order.defeated_factor_index.get(factor, ())), factor) for factor in factor_set]
+    if postings:
+        walked, factor = min(postings, key=lambda posting: posting[0])
+        instrumentation.record_size(f"{name}.posting", walked)
+        instrumentation.fan_out[factor] += walked
+    instrumentation.record_size(f"{name}.result", len(result))
+
+
+def _record_result(instrumentation, name, args, result):
+    instrumentation.record_size(f"{name}.result", len(result))
+
+
+# methods whose posting set and result sizes are recorded as well
+SIZE_RECORDERS = {
+    "get_stronger_defeats": _record_posting,
+    "get_stronger_defeats_bits": _record_posting_bits,
+    "get_incons_pairs_with_case": _record_result,
+    "get_incons_pairs_bits": _record_result,
+}
+
+# the one instrumentation of the package, see FactorRegistry
+instrumentation = Instrumentation()
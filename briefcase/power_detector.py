@@ -1,8 +1,13 @@
+import math
+import random
+import statistics
 from collections import defaultdict
+from functools import reduce
 from itertools import combinations
+from operator import and_
 
 from briefcase.enums import decision_enum
-from briefcase.case import Case
+from briefcase.factor_registry import factor_registry, iter_bits
 
 
 class PowerDetector:
@@ -10,6 +15,41 @@ class PowerDetector:
         self.priority_order = priority_order
         self.factor_list = {decision_enum.pi: set(),
                             decision_enum.delta: set()}
+        # number of cases in the priority order with each factor, so factors can be dropped when cases are removed
+        self.factor_counts = {decision_enum.pi: defaultdict(int),
+                              decision_enum.delta: defaultdict(int)}
+
+    def fork(self, priority_order):
+        """
+        @param priority_order: the fork of this detector's priority order
+        @return: a power detector for the fork, with copies of the factor lists
+        """
+        power_detector = PowerDetector(priority_order)
+        power_detector.factor_list = {polarity: set(factors) for polarity, factors in self.factor_list.items()}
+        power_detector.factor_counts = {polarity: defaultdict(int, counts)
+                                        for polarity, counts in self.factor_counts.items()}
+        return power_detector
+
+    def count_factors(self, decision, reason_bits, defeated_bits, count=1):
+        """
+        @param decision: the decision of a case
+        @param reason_bits: bitset of the reason of the case
+        @param defeated_bits: bitset of the factors defeated by the case
+        @param count: number of such cases added, negative when they are removed
+        Updates the factor lists with the factors of the cases, a factor is dropped when no case has it any more.
+        """
+        if decision not in self.factor_counts:
+            return
+        for polarity, bits in ((decision, reason_bits), (self.other_polarity(decision), defeated_bits)):
+            counts = self.factor_counts[polarity]
+            for position in iter_bits(bits):
+                factor = factor_registry.factors[position]
+                counts[factor] += count
+                if counts[factor] > 0:
+                    self.factor_list[polarity].add(factor)
+                else:
+                    del counts[factor]
+                    self.factor_list[polarity].discard(factor)
 
     def add_factor_list(self, case):
         reason_pol = case.decision
@@ -21,7 +61,7 @@ class PowerDetector:
         for factor in case.reason:
             self.factor_list[reason_pol].add(factor)
 
-        for factor in case.defeated():
+        for factor in case.defeated:
             self.factor_list[defeated_pol].add(factor)
 
     def max_edges(self):
@@ -39,7 +79,7 @@ class PowerDetector:
 
     @staticmethod
     def count_losing_edges_case(case):
-        return (2 ** (len(case.defeated()))) - 1
+        return (2 ** (len(case.defeated))) - 1
 
     def case_power(self, case):
         copy_factor_list = self.factor_list
@@ -73,15 +113,169 @@ class PowerDetector:
                 non_proper_subsets.append(frozenset(subset))
         return non_proper_subsets
 
+    def pairs_by_polarity(self):
+        """
+        @return: the (reason, defeated) bitset pairs of the priority order, grouped by the polarity of the reason
+        """
+        pairs = {decision_enum.pi: [], decision_enum.delta: []}
+        for defeated, reason_set in self.priority_order.bit_order.items():
+            for reason in reason_set:
+                polarity = factor_registry.factors[next(iter_bits(reason))].polarity
+                pairs[polarity].append((reason, defeated))
+        return pairs
+
     def cb_power(self):
         """
         Returns the sum of the number of elements in the priority order.
+        An element is a non-empty subset of a defeated set paired with a superset of one of its reasons,
+        the supersets being taken within the factor list of the reason's polarity.
+        The union of these elements is counted exactly, without being materialised, see _count_union.
         """
-        edges = defaultdict(set)
-        for defeated, reason_set in self.priority_order.order.items():
-            non_proper_subsets_defeated = self.get_non_proper_subsets(defeated)
-            non_proper_supersets_reasons = self.get_non_proper_supersets(reason_set)
-            for subset_defeated in non_proper_subsets_defeated:
-                edges[subset_defeated].update(non_proper_supersets_reasons)
-
-        return sum(len(reason_set) for defeated, reason_set in edges.items())
+        power = 0
+        for polarity, pairs in self.pairs_by_polarity().items():
+            if not pairs:
+                continue
+            reason_universe = factor_registry.encode(self.factor_list[polarity])
+            defeated_universe = factor_registry.encode(self.factor_list[self.other_polarity(polarity)])
+            n_reason = reason_universe.bit_count()
+            n = n_reason + defeated_universe.bit_count()
+
+            # Each pair covers the elements whose defeated subset lacks every factor outside its defeated set,
+            # and whose reason superset has every factor of its reason. Counting the factors outside the
+            # defeated subset rather than inside it, both conditions are "these factors are all present".
+            cache = {}
+            elements = _count_union([(defeated_universe & ~defeated) | reason for reason, defeated in pairs],
+                                    n, cache)
+            # take away the elements with an empty defeated subset, which have every defeated factor outside
+            empty_defeated = _count_union([reason for reason, defeated in pairs], n_reason, cache)
+            power += elements - empty_defeated
+
+        return power
+
+    def estimate_cb_power(self, samples=10000, confidence=0.95, seed=None):
+        """
+        Monte Carlo estimate of cb_power, for factor lists too wide to count exactly.
+        Uses the Karp-Luby-Madras estimator: an element is drawn from a pair in proportion to the number of
+        elements the pair covers, and weighted by one over the number of pairs which cover it.
+        @param samples: number of elements to draw
+        @param confidence: confidence level of the interval returned
+        @param seed: seed for the random draws
+        @return: the estimated power, and a (low, high) confidence interval for it
+        """
+        rng = random.Random(seed)
+        boxes = []
+        for polarity, pairs in self.pairs_by_polarity().items():
+            reason_universe = factor_registry.encode(self.factor_list[polarity])
+            boxes.extend((reason, defeated, reason_universe & ~reason) for reason, defeated in pairs)
+        if not boxes:
+            return 0, (0, 0)
+
+        sizes = [(2 ** defeated.bit_count() - 1) * 2 ** free.bit_count() for reason, defeated, free in boxes]
+        total = sum(sizes)
+        estimates = []
+        for reason, defeated, free in rng.choices(boxes, weights=sizes, k=samples):
+            # a uniform non-empty subset of the defeated set, and a uniform superset of the reason
+            sub_defeated = _scatter(rng.randrange(1, 2 ** defeated.bit_count()), defeated)
+            super_reason = reason | _scatter(rng.getrandbits(free.bit_count()), free)
+            covering = sum(1 for stronger in self.priority_order.get_stronger_defeats_bits(sub_defeated)
+                           for stronger_reason in self.priority_order.bit_order[stronger]
+                           if stronger_reason & ~super_reason == 0)
+            estimates.append(total / covering)
+
+        estimate = statistics.fmean(estimates)
+        if samples < 2:
+            return estimate, (estimate, estimate)
+        half_width = (statistics.NormalDist().inv_cdf((1 + confidence) / 2) *
+                      statistics.stdev(estimates) / math.sqrt(samples))
+        return estimate, (estimate - half_width, estimate + half_width)
+
+    @staticmethod
+    def other_polarity(polarity):
+        return decision_enum.delta if polarity == decision_enum.pi else decision_enum.pi
+
+
+def _scatter(bits, mask):
+    """
+    @return: the low bits of bits moved onto the set bits of mask, in order
+    """
+    scattered = 0
+    for position in iter_bits(mask):
+        if bits & 1:
+            scattered |= 1 << position
+        bits >>= 1
+    return scattered
+
+
+def _minimal_terms(terms):
+    """
+    @return: the terms which have no other term as a subset, smallest first
+    """
+    minimal = []
+    for term in sorted(set(terms), key=int.bit_count):
+        if all(kept & ~term for kept in minimal):
+            minimal.append(term)
+    return minimal
+
+
+def _components(terms):
+    """
+    @return: list of (terms, mask) for groups of terms which share no bits with any other group
+    """
+    components = []
+    for term in terms:
+        merged_terms, merged_mask = [term], term
+        separate = []
+        for component_terms, mask in components:
+            if mask & merged_mask:
+                merged_terms.extend(component_terms)
+                merged_mask |= mask
+            else:
+                separate.append((component_terms, mask))
+        separate.append((merged_terms, merged_mask))
+        components = separate
+    return components
+
+
+def _count_union(terms, n, cache):
+    """
+    @param terms: bitsets, each the set of variables a term needs to be true
+    @param n: the number of variables, every term is within them
+    @param cache: dict of counts already made, shared between calls
+    @return: number of the 2 ** n assignments to the variables which make at least one term true
+    Only the minimal terms matter, since a term with another term as a subset covers nothing new.
+    Variables in every term are fixed, independent groups of terms are counted separately, and the rest uses
+    inclusion-exclusion: |A1 u .. u Ak| = |A1 u .. u Ak-1| + |Ak| - |(A1 n Ak) u .. u (Ak-1 n Ak)|
+    """
+    terms = _minimal_terms(terms)
+    if not terms:
+        return 0
+    common = reduce(and_, terms)
+    if common:
+        terms = [term & ~common for term in terms]
+        n -= common.bit_count()
+    if len(terms) == 1:
+        return 2 ** (n - terms[0].bit_count())
+
+    key = (frozenset(terms), n)
+    if key in cache:
+        return cache[key]
+
+    components = _components(terms)
+    if len(components) > 1:
+        # an assignment misses the union only when it misses every component
+        missed, n_used = 1, 0
+        for component_terms, mask in components:
+            n_component = mask.bit_count()
+            n_used += n_component
+            missed *= 2 ** n_component - _count_union(component_terms, n_component, cache)
+        count = 2 ** n - missed * 2 ** (n - n_used)
+    else:
+        count = 0
+        for k, term in enumerate(terms):
+            count += 2 ** (n - term.bit_count())
+            if k:
+                # the intersection of two terms needs the variables of both
+                count -= _count_union([previous | term for previous in terms[:k]], n, cache)
+
+    cache[key] = count
+    return count
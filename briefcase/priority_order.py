@@ -2,18 +2,37 @@ from collections import defaultdict
 from itertools import combinations
 from briefcase.power_detector import PowerDetector
 from briefcase.admissibility_constraints import AdmissibilityConstraints
+from briefcase.bit_matrix import conflict_indices, to_bool_matrix
+from briefcase.conflict_graph import ConflictGraph
+from briefcase.cow_dict import CowDict
+from briefcase.defeat_index import DefeatIndex
 from briefcase.enums import incons_enum, decision_enum
+from briefcase.factor_registry import factor_registry, iter_bits
 
 
 class PriorityOrder:
     """
     Orders reasons and factors in a dictionary.
     Key is a frozenset of the stronger factors, value is a frozenset of the weaker factors.
+    The same order is kept in bit_order with the factor sets encoded as ints (see FactorRegistry),
+    which is what the consistency checks run on. The frozenset order is kept as a view.
     """
 
     def __init__(self, empty_sides=False):
-        self.order = defaultdict(set)
-        self.defeated_factor_index = defaultdict(set)
+        # the indexes of sets are CowDicts, so the order can be forked without copying them, see fork
+        self.order = CowDict(set)
+        self.defeated_factor_index = CowDict(set)
+        self.bit_order = CowDict(set)
+        self.defeated_bits_index = CowDict(set)
+        self.defeat_index = DefeatIndex()
+        self.incons_pairs = set()  # (reason, defeated) bitset pairs in the order which are inconsistent
+        self.pair_counts = defaultdict(int)  # number of cases added with each (reason, defeated) pair
+        # decision -> {(reason, defeated): number of cases}, of the cases added with an empty side, which have no pair
+        # in the order but are precedents all the same, see get_empty_side_rd_pairs_bits
+        self.empty_side_counts = {}
+        self.tainted_count = 0  # number of cases added with a pair which is inconsistent
+        self.conflicts = ConflictGraph(self.pair_counts)  # which of the inconsistent pairs are inconsistent together
+        self.version = 0  # number of changes to the pairs of the order, for caches of queries on it
         self.admissibility_constraints = AdmissibilityConstraints(self)
         self.PD = PowerDetector(self)
         self.empty_sides=empty_sides
@@ -24,73 +43,207 @@ class PriorityOrder:
         @param new_defeated: a frozenset of factors, weaker than the reason
         @return: list of pairs of reasons, defeated which are inconsistent with a new case
         """
+        incons_pairs = self.get_incons_pairs_bits(factor_registry.encode(new_reason),
+                                                  factor_registry.encode(new_defeated))
+        return [(factor_registry.decode(reason), factor_registry.decode(defeated))
+                for reason, defeated in incons_pairs]
+
+    def get_incons_pairs_bits(self, new_reason, new_defeated):
+        """
+        @param new_reason: bitset of the reason factors
+        @param new_defeated: bitset of the factors weaker than the reason
+        @return: list of pairs of reason, defeated bitsets which are inconsistent with a new case
+        """
         # ... P > D (subsets)
         # we want to find all P2, D2 where P2 > P and D2 < D
         # D2 > P2
         # get all defeats which are stronger than the reason
-
-        supersets = self.get_stronger_defeats(new_reason)
-        case_sets = [(self.order[superset], superset) for superset in supersets]
-
         incons_pairs = []
-        for case in case_sets:
-            reasons = case[0]
-            defeated = case[1]
-            for reason in reasons:
-                if reason.issubset(new_defeated):
+        for defeated in self.get_stronger_defeats_bits(new_reason):
+            for reason in self.bit_order[defeated]:
+                if reason & ~new_defeated == 0:  # reason is a subset of new_defeated
                     incons_pairs.append((reason, defeated))
 
         return incons_pairs
 
+    def get_incons_pairs_many(self, new_pairs):
+        """
+        @param new_pairs: list of (reason, defeated) bitset pairs of candidate cases
+        @return: list with, for each candidate, the list of (reason, defeated) bitset pairs in the order which are
+                 inconsistent with it, as get_incons_pairs_bits would give one candidate at a time
+        """
+        # one boolean matrix pass per polarity, each candidate is checked against the pairs of the other polarity
+        by_polarity = self.PD.pairs_by_polarity()
+        result = [[] for _ in new_pairs]
+        for polarity, stored in by_polarity.items():
+            rows = [k for k, (reason, defeated) in enumerate(new_pairs)
+                    if reason and factor_registry.factors[next(iter_bits(reason))].polarity != polarity]
+            if not rows or not stored:
+                continue
+            universe = 0
+            for reason, defeated in stored:
+                universe |= reason | defeated
+            for k in rows:
+                universe |= new_pairs[k][0] | new_pairs[k][1]
+            i, j = conflict_indices(to_bool_matrix([new_pairs[k][0] for k in rows], universe),
+                                    to_bool_matrix([new_pairs[k][1] for k in rows], universe),
+                                    to_bool_matrix([reason for reason, defeated in stored], universe),
+                                    to_bool_matrix([defeated for reason, defeated in stored], universe))
+            for row, col in zip(i.tolist(), j.tolist()):
+                result[rows[row]].append(stored[col])
+        return result
 
     def is_existing_claim(self, new_reason, new_defeated):
         """Checks priority order remains the same"""
+        return self.is_existing_claim_bits(factor_registry.encode(new_reason), factor_registry.encode(new_defeated))
+
+    def is_existing_claim_bits(self, new_reason, new_defeated):
+        """Checks priority order remains the same, for a reason and defeated given as bitsets"""
         # if there exists a case with a stronger than or equal to defeated
-        for stronger_defeat in self.get_stronger_defeats(new_defeated):
+        for stronger_defeat in self.get_stronger_defeats_bits(new_defeated):
             # and with a weaker or equal to reason
-            if any(new_reason.issuperset(reason) for reason in self.order[stronger_defeat]):
+            if any(reason & ~new_reason == 0 for reason in self.bit_order[stronger_defeat]):
                 return True
         return False
 
     def get_stronger_defeats(self, factor_set):
-        # Retrieve all entries in defeated_factor_index for all factors within factor_set (defeats_that_intersect)
-        # Cast existing set of references to a frozenset within a set
-        defeats_that_intersect = {frozenset(self.defeated_factor_index[factor]) for factor in factor_set}
-
-        # Find the intersection of all sets retrieved above, exploiting the references property
-        # This gives us all sets of factors which are stronger than our factor_set - supersets
-        # To optimise this, we order by size so that initially smaller sets are compared for intersections
-        sorted_defeats_that_intersect = sorted(defeats_that_intersect, key=lambda x: len(x))
-        if sorted_defeats_that_intersect:
-            supersets = frozenset.intersection(*sorted_defeats_that_intersect)
-            return supersets
-        return []
-
-    # def get_weaker_defeats(self, factor_set):
-    #     # Retrieve all entries in defeated_factor_index which are weaker than a given factor set
-    #     # This any factor sets containing any number of the factors in the factor set
-    #
-    #     """
-    #     How do I find all subsets of a factorset e.g. {d1, d2, d3},
-    #     d1 ={{d1, d3}, {d1, d2}}
-    #     d2 = {{d1, d2}, {d2, d5}}
-    #     d3 = {{d1, d3}, {d4}}
-    #     d4 = {{d4}}
-    #
-    #     I don't think you can efficiently. Let's just loop through
-    #     """
-    #
-    #     # Initialize an empty set to store the union of all sets
-    #     weaker_defeats = set()
-    #
-    #     # Iterate through each factor in factor_set and update the union
-    #     for factor in factor_set:
-    #         candidate_weaker_defeats = self.defeated_factor_index[factor]
-    #         for candidate in candidate_weaker_defeats:
-    #             if candidate.issubset(factor_set):
-    #                 weaker_defeats.add(candidate)
-    #
-    #     return weaker_defeats
+        """
+        @param factor_set: a frozenset of factors
+        @return: list of the defeated sets in the order which are supersets of factor_set
+        """
+        # Every superset of factor_set is in the posting set of each of its factors, so rather than
+        # intersecting copies of all the posting sets, only the smallest one is walked and filtered.
+        # A factor with no posting set means there are no supersets at all.
+        smallest = None
+        for factor in factor_set:
+            defeats = self.defeated_factor_index.get(factor)
+            if not defeats:
+                return []
+            if smallest is None or len(defeats) < len(smallest):
+                smallest = defeats
+        if smallest is None:
+            return []
+        return [defeated for defeated in smallest if factor_set <= defeated]
+
+    def get_stronger_defeats_bits(self, bits):
+        """
+        @param bits: bitset of factors
+        @return: list of the defeated bitsets in the order which are supersets of bits
+        """
+        # Same as get_stronger_defeats, with the subset filter done on ints
+        smallest = None
+        for position in iter_bits(bits):
+            defeats = self.defeated_bits_index.get(position)
+            if not defeats:
+                return []
+            if smallest is None or len(defeats) < len(smallest):
+                smallest = defeats
+        if smallest is None:
+            return []
+        return [defeated for defeated in smallest if bits & ~defeated == 0]
+
+    def get_weaker_defeats(self, factor_set):
+        """
+        @param factor_set: a frozenset of factors
+        @return: frozenset of the defeated sets in the order which are subsets of factor_set
+        """
+        return frozenset(factor_registry.decode(defeated)
+                         for defeated in self.get_weaker_defeats_bits(factor_registry.encode(factor_set)))
+
+    def get_weaker_defeats_bits(self, bits):
+        """
+        @param bits: bitset of factors
+        @return: list of the defeated bitsets in the order which are subsets of bits
+        """
+        # The inverted index cannot answer this by intersecting posting sets,
+        # the defeat index rules out every defeated set holding a factor outside of bits instead
+        return self.defeat_index.subsets(bits)
+
+    def get_minimal_rd_pairs(self, new_reason, new_defeated, max_distance):
+        """
+        @param new_reason: a frozenset of factors
+        @param new_defeated: a frozenset of factors, weaker than the reason
+        @param max_distance: the largest relevant difference to look for
+        @return: the size of the minimal relevant difference of a new case from a pair of the same polarity,
+                 and the list of (reason, defeated) pairs with it, or (None, []) when none is within max_distance
+        """
+        distance, pairs = self.get_minimal_rd_pairs_bits(factor_registry.encode(new_reason),
+                                                         factor_registry.encode(new_defeated), max_distance)
+        return distance, [(factor_registry.decode(reason), factor_registry.decode(defeated))
+                          for reason, defeated in pairs]
+
+    def get_minimal_rd_pairs_bits(self, new_reason, new_defeated, max_distance):
+        """
+        @param new_reason: bitset of the reason factors
+        @param new_defeated: bitset of the factors weaker than the reason
+        @param max_distance: the largest relevant difference to look for
+        @return: the size of the minimal relevant difference of a new case from a pair of the same polarity,
+                 and the list of (reason, defeated) bitset pairs with it, or (None, []) when none is within max_distance
+        For a pair of the same polarity the relevant differences (see Case.relevant_diff_from) are the factors of
+        its reason missing from the new reason, and the factors of the new defeated missing from its defeated.
+        The pairs of the cases with the same decision and an empty side are searched too, see
+        get_empty_side_rd_pairs_bits.
+        """
+        if new_defeated:
+            defeated_polarity = factor_registry.factors[(new_defeated & -new_defeated).bit_length() - 1].polarity
+        elif new_reason:
+            reason_polarity = factor_registry.factors[(new_reason & -new_reason).bit_length() - 1].polarity
+            defeated_polarity = self.PD.other_polarity(reason_polarity)
+        else:
+            return None, []
+
+        candidates = [(distance, reason, defeated)
+                      for distance, reason, defeated in self.get_rd_pairs_bits(new_reason, new_defeated, max_distance)
+                      if factor_registry.factors[(defeated & -defeated).bit_length() - 1].polarity
+                      == defeated_polarity]
+        candidates += self.get_empty_side_rd_pairs_bits(new_reason, new_defeated, max_distance,
+                                                        self.PD.other_polarity(defeated_polarity))
+
+        best, pairs = None, []
+        for distance, reason, defeated in candidates:
+            if best is not None and distance > best:
+                continue
+            if distance != best:
+                best, pairs = distance, []
+            pairs.append((reason, defeated))
+        return best, pairs
+
+    def get_rd_pairs_bits(self, new_reason, new_defeated, max_distance):
+        """
+        @param new_reason: bitset of the reason factors
+        @param new_defeated: bitset of the factors weaker than the reason
+        @param max_distance: the largest relevant difference to look for
+        @return: list of (distance, reason, defeated) of the bitset pairs in the order with at most max_distance
+                 factors of their reason missing from new_reason and of new_defeated missing from their defeated,
+                 with that number of factors as the distance
+        This is the relevant difference of a new case from the pairs of its polarity, the pairs of either polarity
+        are returned and the caller keeps those of the polarity it wants.
+        """
+        # only defeated sets missing at most max_distance of the new defeated factors can be close enough
+        result = []
+        for defeated, missing in self.defeat_index.near_supersets(new_defeated, max_distance):
+            for reason in self.bit_order[defeated]:
+                distance = missing + (reason & ~new_reason).bit_count()
+                if distance <= max_distance:
+                    result.append((distance, reason, defeated))
+        return result
+
+    def get_empty_side_rd_pairs_bits(self, new_reason, new_defeated, max_distance, decision):
+        """
+        @param new_reason: bitset of the reason factors
+        @param new_defeated: bitset of the factors weaker than the reason
+        @param max_distance: the largest relevant difference to look for
+        @param decision: the decision of the cases to look at
+        @return: list of (distance, reason, defeated) as get_rd_pairs_bits, of the pairs of the cases with the
+                 decision and an empty side, which are not in the order
+        They are compared one at a time, as there are few distinct pairs with an empty side
+        """
+        result = []
+        for reason, defeated in self.empty_side_counts.get(decision, ()):
+            distance = (reason & ~new_reason).bit_count() + (new_defeated & ~defeated).bit_count()
+            if distance <= max_distance:
+                result.append((distance, reason, defeated))
+        return result
 
     def add_order_with_subsets(self, reason, defeated):
         """
@@ -102,10 +255,52 @@ class PriorityOrder:
         """
 
         if reason != frozenset() and defeated != frozenset():
-            self.order[defeated].add(reason)
+            self.order.owned_values(defeated).add(reason)
 
             for factor in defeated:
-                self.defeated_factor_index[factor].add(defeated)
+                self.defeated_factor_index.owned_values(factor).add(defeated)
+
+            self.add_order_bits(factor_registry.encode(reason), factor_registry.encode(defeated))
+
+    def add_order_bits(self, reason, defeated):
+        """
+        @param reason: bitset of the reason factors
+        @param defeated: bitset of the factors weaker than the reason
+        Adds defeated: reason to the bitset order, and the defeated bitset to the posting set of each of its factors.
+        The inconsistent pairs are updated with the conflicts of the new pair only.
+        """
+        if reason in self.bit_order.get(defeated, ()):
+            return  # pair already in the order, so its conflicts are already known
+
+        incons_pairs = self.get_incons_pairs_bits(reason, defeated)
+        if incons_pairs:
+            self.conflicts.add_edges(incons_pairs, (reason, defeated))
+            incons_pairs.append((reason, defeated))
+            self.mark_incons_pairs(incons_pairs)
+
+        self.index_pair_bits(reason, defeated)
+
+    def index_pair_bits(self, reason, defeated):
+        """
+        Adds defeated: reason to the bitset order and the indexes over the defeated bitsets,
+        without updating the inconsistent pairs
+        """
+        self.bit_order.owned_values(defeated).add(reason)
+        self.version += 1
+        self.defeat_index.add(defeated)
+
+        for position in iter_bits(defeated):
+            self.defeated_bits_index.owned_values(position).add(defeated)
+
+    def mark_incons_pairs(self, pairs):
+        """
+        @param pairs: (reason, defeated) bitset pairs which are inconsistent
+        """
+        for pair in pairs:
+            if pair not in self.incons_pairs:
+                # every case already added with this pair is now tainted
+                self.incons_pairs.add(pair)
+                self.tainted_count += self.pair_counts.get(pair, 0)
 
     def is_consistent(self, new_reason, new_defeated):
         """
@@ -114,35 +309,37 @@ class PriorityOrder:
         @return: True/False if for the new_reason being stronger than the new_defeated,
                 this causes inconsistency with the existing Case Base order
         """
-        supersets = self.get_stronger_defeats(new_reason)
+        return self.is_consistent_bits(factor_registry.encode(new_reason), factor_registry.encode(new_defeated))
 
-        # Looking at each (defeated) superset within the set of supersets,
-        # Retrieve the (reason) entry in the existing order dictionary - this will be a set of reasons for each
-        # Intersecting case
-        reasons_sets = [self.order[superset] for superset in supersets]
-
-        # If for any of the existing reasons sets retrieved, if the new defeated is a superset of one of
-        # the sets of old reasons, return False (inconsistent)
-        return not any(any(reason.issubset(new_defeated) for reason in reasons) for reasons in reasons_sets)
+    def is_consistent_bits(self, new_reason, new_defeated):
+        """
+        @param new_reason: bitset of the reason factors
+        @param new_defeated: bitset of the factors weaker than the reason
+        @return: True/False if for the new_reason being stronger than the new_defeated,
+                this causes inconsistency with the existing Case Base order
+        """
+        # Looking at each (defeated) superset of the new reason, retrieve the (reason) entries in the order.
+        # If the new defeated is a superset of one of the old reasons, return False (inconsistent)
+        for superset in self.get_stronger_defeats_bits(new_reason):
+            for reason in self.bit_order[superset]:
+                if reason & ~new_defeated == 0:
+                    return False
+        return True
 
     def is_cb_consistent(self):
         """
         @return : True/False if current ordering of the cb order is consistent
         Inconsistency must be strict
         """
-        # loop through all cases in order
-        for defeated, reason_set in self.order.items():
-            for reason in reason_set:
-                if not self.is_consistent(reason, defeated):
-                    return False
-        return True
+        # inconsistent pairs are tracked as each pair is added, see add_order_bits
+        return not self.incons_pairs
 
     def is_cb_consistent_with(self, case):
         """
         @param case: a new case
         @return: True/False if the current cb order would be consistent with a new case added
         """
-        return self.is_consistent(case.reason, case.defeated())
+        return self.is_consistent_bits(case.reason_bits, case.defeated_bits)
 
     def unsafe_add_case(self, case):
         """
@@ -150,19 +347,234 @@ class PriorityOrder:
         Adds a new case to order dict with no safety checks for inconsistency
         """
         # case 1: we know the winning reason is at least as strong as the defeated factors, since it won
-        if (case.reason and case.defeated()) or self.empty_sides: # cannot have an empty side
-            self.add_order_with_subsets(case.reason, case.defeated())
-            self.PD.add_factor_list(case)
+        if (case.reason and case.defeated) or self.empty_sides: # cannot have an empty side
+            self.add_order_with_subsets(case.reason, case.defeated)
+            self.PD.count_factors(case.decision, case.reason_bits, case.defeated_bits)
+
+            pair = (case.reason_bits, case.defeated_bits)
+            if case.reason_bits and case.defeated_bits:
+                self.pair_counts[pair] += 1
+                if pair in self.incons_pairs:
+                    self.tainted_count += 1
+                    self.conflicts.count_cases(pair, 1)
+            else:
+                self.count_empty_side(case, 1)
             return True
         return False
 
+    def count_empty_side(self, case, count):
+        """
+        @param case: a case with an empty reason or defeated side
+        @param count: the change in the number of such cases, 1 when it is added and -1 when it is removed
+        @return: False when a case was to be removed but none was counted
+        """
+        counts = self.empty_side_counts.setdefault(case.decision, {})
+        pair = (case.reason_bits, case.defeated_bits)
+        total = counts.get(pair, 0) + count
+        if total < 0:
+            return False
+        if total:
+            counts[pair] = total
+        else:
+            counts.pop(pair, None)
+        return True
+
+    def remove_case(self, case):
+        """
+        @param case: a case added to the priority order, to be removed from it
+        @return: True when the case was in the order, as unsafe_add_case would have added it
+        Removes a case, undoing unsafe_add_case. Its pair stays in the order while other cases have it,
+        see remove_pair_bits.
+        """
+        if case.reason_bits and case.defeated_bits:
+            if self.pair_counts.get((case.reason_bits, case.defeated_bits), 0) <= 0:
+                return False  # no case with its pair is counted, e.g. after remove_pair took the last of them
+            return self.remove_pair_bits(case.reason_bits, case.defeated_bits)
+        # a case with an empty side has no pair in the order, its factors are counted when empty_sides is set
+        if not self.count_empty_side(case, -1):
+            return False
+        if self.empty_sides:
+            self.PD.count_factors(case.decision, case.reason_bits, case.defeated_bits, -1)
+        return True
+
+    def remove_pair(self, reason, defeated):
+        """
+        @param reason: a frozenset of factors
+        @param defeated: a frozenset of factors, weaker than the reason
+        @return: True when the pair was in the order and one of its cases has been removed
+        """
+        return self.remove_pair_bits(factor_registry.encode(reason), factor_registry.encode(defeated))
+
+    def remove_pair_bits(self, reason, defeated):
+        """
+        @param reason: bitset of the reason factors
+        @param defeated: bitset of the factors weaker than the reason
+        @return: True when the pair was in the order and one of its cases has been removed
+        Removes one of the cases with defeated: reason, as remove_case would, with its factors no longer counted
+        (see PowerDetector.count_factors). The pair stays in the order while other cases have it, and is dropped
+        with the last one, see _drop_pair_bits. A pair added with no cases, by add_order_with_subsets, is dropped.
+        """
+        pair = (reason, defeated)
+        if reason not in self.bit_order.get(defeated, ()):
+            return False
+        if self.pair_counts.get(pair, 0) <= 0:
+            self._drop_pair_bits(reason, defeated)
+            return True
+
+        # the reason of a case is on the side of its decision
+        decision = factor_registry.factors[(reason & -reason).bit_length() - 1].polarity
+        self.PD.count_factors(decision, reason, defeated, -1)
+        if pair in self.incons_pairs:
+            self.tainted_count -= 1
+            self.conflicts.count_cases(pair, -1)
+        self.pair_counts[pair] -= 1
+        if self.pair_counts[pair] <= 0:
+            self._drop_pair_bits(reason, defeated)
+        return True
+
+    def _drop_pair_bits(self, reason, defeated):
+        """
+        @param reason: bitset of the reason factors
+        @param defeated: bitset of the factors weaker than the reason
+        Removes defeated: reason from the order and its indexes, whatever the number of cases with it, and those
+        cases are no longer counted. Only the pairs inconsistent with this one can become consistent by its removal,
+        which they do when it was the last pair they were inconsistent with in the conflict graph.
+        """
+        pair = (reason, defeated)
+        partners = self.conflicts.neighbours(pair)
+        self.version += 1
+
+        if self.bit_order.remove_value(defeated, reason):
+            self.defeat_index.remove(defeated)
+            for position in iter_bits(defeated):
+                self.defeated_bits_index.remove_value(position, defeated)
+
+        reason_set, defeated_set = factor_registry.decode(reason), factor_registry.decode(defeated)
+        if self.order.remove_value(defeated_set, reason_set):
+            for factor in defeated_set:
+                self.defeated_factor_index.remove_value(factor, defeated_set)
+
+        self.conflicts.remove_pair(pair)  # before its count goes, which is taken off its partners' case degrees
+        count = self.pair_counts.pop(pair, 0)
+        if pair in self.incons_pairs:
+            self.incons_pairs.discard(pair)
+            self.tainted_count -= count
+            for partner in partners:
+                if partner in self.incons_pairs and partner not in self.conflicts:
+                    self.incons_pairs.discard(partner)
+                    self.tainted_count -= self.pair_counts.get(partner, 0)
+
+    def bulk_add_cases(self, cases):
+        """
+        @param cases: the new cases to be added to the priority order
+        @return: list of the cases which were added, as unsafe_add_case would add them one at a time
+        Adds many cases at once with no safety checks for inconsistency.
+        Identical (reason, defeated) pairs are indexed once, and the inconsistencies of the new pairs are found
+        for the whole batch with boolean matrices (see bit_matrix) rather than with a lookup per pair.
+        """
+        added = []
+        batch_counts = defaultdict(int)
+        new_pairs = {}  # new (reason, defeated) bitset pair -> a case with that pair
+        side_counts = defaultdict(int)  # (decision, reason, defeated) -> number of cases, to count factors once
+        for case in cases:
+            if not ((case.reason and case.defeated) or self.empty_sides):  # cannot have an empty side
+                continue
+            added.append(case)
+            side_counts[(case.decision, case.reason_bits, case.defeated_bits)] += 1
+            if case.reason_bits and case.defeated_bits:
+                pair = (case.reason_bits, case.defeated_bits)
+                batch_counts[pair] += 1
+                if pair not in new_pairs and case.reason_bits not in self.bit_order.get(case.defeated_bits, ()):
+                    new_pairs[pair] = case
+            else:
+                self.count_empty_side(case, 1)
+
+        for (decision, reason, defeated), count in side_counts.items():
+            self.PD.count_factors(decision, reason, defeated, count)
+
+        for (reason, defeated), case in new_pairs.items():
+            self.order.owned_values(case.defeated).add(case.reason)
+            for factor in case.defeated:
+                self.defeated_factor_index.owned_values(factor).add(case.defeated)
+            self.index_pair_bits(reason, defeated)
+
+        # cases with a pair which is already inconsistent are tainted straight away
+        for pair, count in batch_counts.items():
+            self.pair_counts[pair] += count
+            if pair in self.incons_pairs:
+                self.tainted_count += count
+                self.conflicts.count_cases(pair, count)
+
+        edges = self.get_incons_edges_bulk(new_pairs)
+        rank = {pair: k for k, pair in enumerate(new_pairs)}
+        earliers = defaultdict(list)
+        for a, b in edges:
+            # pairs already in the order come before the new ones, and new pairs in the order of their first case
+            if rank.get(a, -1) > rank.get(b, -1):
+                a, b = b, a
+            earliers[b].append(a)
+        for later, pairs in earliers.items():
+            self.conflicts.add_edges(pairs, later)
+        self.mark_incons_pairs({pair for edge in edges for pair in edge})
+        return added
+
+    def get_incons_edges_bulk(self, pairs):
+        """
+        @param pairs: (reason, defeated) bitset pairs in the order
+        @return: list of each pair of pairs in the order which are inconsistent with each other,
+                 where at least one of the two is one of the given pairs
+        """
+        # only pairs with opposite decisions can be inconsistent, so the given pi pairs are checked against all
+        # delta pairs, and the given delta pairs against the pi pairs which were not already checked
+        by_polarity = self.PD.pairs_by_polarity()
+        pi_rows = [pair for pair in by_polarity[decision_enum.pi] if pair in pairs]
+        delta_rows = [pair for pair in by_polarity[decision_enum.delta] if pair in pairs]
+        unchecked_pi = [pair for pair in by_polarity[decision_enum.pi] if pair not in pairs]
+        universe = factor_registry.encode(self.PD.factor_list[decision_enum.pi] |
+                                          self.PD.factor_list[decision_enum.delta])
+        edges = []
+        for rows, cols in ((pi_rows, by_polarity[decision_enum.delta]), (delta_rows, unchecked_pi)):
+            if not rows or not cols:
+                continue
+            i, j = conflict_indices(to_bool_matrix([reason for reason, defeated in rows], universe),
+                                    to_bool_matrix([defeated for reason, defeated in rows], universe),
+                                    to_bool_matrix([reason for reason, defeated in cols], universe),
+                                    to_bool_matrix([defeated for reason, defeated in cols], universe))
+            edges.extend((rows[row], cols[col]) for row, col in zip(i.tolist(), j.tolist()))
+        return edges
+
+    def fork(self):
+        """
+        @return: a copy of the priority order which can be added to without changing this one, or vice versa.
+        The indexes of sets are shared until one of the two writes to them (see CowDict), and the defeat index
+        until one of the two adds to it, so a fork costs a copy of their keys rather than of the whole order.
+        """
+        order = PriorityOrder.__new__(PriorityOrder)
+        order.order = self.order.fork()
+        order.defeated_factor_index = self.defeated_factor_index.fork()
+        order.bit_order = self.bit_order.fork()
+        order.defeated_bits_index = self.defeated_bits_index.fork()
+        order.defeat_index = self.defeat_index.fork()
+        order.incons_pairs = set(self.incons_pairs)
+        order.pair_counts = defaultdict(int, self.pair_counts)
+        order.empty_side_counts = {decision: dict(counts) for decision, counts in self.empty_side_counts.items()}
+        order.conflicts = self.conflicts.fork(order.pair_counts)
+        order.tainted_count = self.tainted_count
+        order.version = self.version
+        order.admissibility_constraints = AdmissibilityConstraints(order,
+                                                                   self.admissibility_constraints.mrd_threshold)
+        order.PD = self.PD.fork(order)
+        order.empty_sides = self.empty_sides
+        return order
+
     def safe_add_case(self, case, incons):
         """
         @param case: the new case to be added to the priority order
         @param incons: the constraint to be used when adding the new case to the priority order
         """
-        if self.admissibility_constraints.is_case_admissible(case.reason, case.defeated(), incons):
-            self.unsafe_add_case(case)
+        if self.admissibility_constraints.is_case_admissible_bits(case.reason_bits, case.defeated_bits, incons):
+            if not self.unsafe_add_case(case):
+                self.count_empty_side(case, 1)  # admitted with an empty side, which unsafe_add_case leaves out
             return True
         return False
 
@@ -0,0 +1,149 @@
+import random
+
+from briefcase.case import Case
+from briefcase.case_base import CaseBase
+from briefcase.case_stream import write_cases
+from briefcase.enums import decision_enum
+from briefcase.factor import Factor
+
+"""
+Generator of synthetic cases, for stress testing case bases far larger than the masters_thesis datasets.
+Cases are drawn with pi factors p0, p1, ... and delta factors d0, d1, ..., each factor of a case present with a fixed
+probability. Each factor has a hidden random weight, and a case is decided for the side with the greater weight,
+with a reason which outweighs its defeated factors. Cases decided this way are consistent with each other, since a
+reason which is a subset of an earlier defeated set weighs less than the earlier reason, and so less than any
+superset of it.
+A fraction of the cases repeat an earlier case, and a fraction are built to be inconsistent with an earlier case,
+so the duplicate and inconsistency rates of a case base can be set.
+The same seed always gives the same cases, whether they are added to a CaseBase or written to a file.
+"""
+
+# tries at drawing a case decided as pi_rate says, before the case drawn last is kept whatever its decision
+MAX_REDRAWS = 100
+
+
+def iter_synthetic_cases(n_cases, n_pi=20, n_delta=20, density=0.3, reason_size=None, pi_rate=0.5,
+                         duplicate_rate=0.0, conflict_rate=0.0, seed=42, pool_size=10000):
+    """
+    @param n_cases: number of cases
+    @param n_pi: number of pi factors to draw from
+    @param n_delta: number of delta factors to draw from
+    @param density: probability of each factor being in a case, every case has at least one factor of each polarity
+    @param reason_size: (smallest, largest) number of factors of the reason, or None for the whole side of the
+                        decision as in the masters_thesis datasets. A reason which does not outweigh its defeated
+                        factors gets more factors of its side until it does
+    @param pi_rate: probability of a case being decided for pi
+    @param duplicate_rate: probability of a case being a repeat of an earlier case
+    @param conflict_rate: probability of a case being built to be inconsistent with an earlier case,
+                          the other cases are all consistent with each other
+    @param seed: random seed
+    @param pool_size: number of earlier cases kept to repeat or conflict with, a uniform sample of all of them
+    @return: generator of the cases
+    """
+    for name, rate in (("density", density), ("pi_rate", pi_rate), ("duplicate_rate", duplicate_rate),
+                       ("conflict_rate", conflict_rate)):
+        if not 0 <= rate <= 1:
+            raise ValueError(f"{name} must be between 0 and 1, not {rate}")
+    if n_pi < 1 or n_delta < 1:
+        raise ValueError("There must be at least one pi and one delta factor")
+
+    rng = random.Random(seed)
+    factors = {
+        decision_enum.pi: [Factor(f"p{k}", decision_enum.pi) for k in range(n_pi)],
+        decision_enum.delta: [Factor(f"d{k}", decision_enum.delta) for k in range(n_delta)],
+    }
+    weights = {factor: rng.random() for polarity_factors in factors.values() for factor in polarity_factors}
+    pool = []  # earlier cases, kept by reservoir sampling
+    for count in range(n_cases):
+        draw = rng.random()
+        if pool and draw < duplicate_rate:
+            case = rng.choice(pool)
+        elif pool and draw < duplicate_rate + conflict_rate:
+            case = _conflicting_case(rng, rng.choice(pool), factors, density, reason_size)
+        else:
+            target = decision_enum.pi if rng.random() < pi_rate else decision_enum.delta
+            # factors are redrawn until the side of the target decision is the heavier, so pi_rate sets the balance,
+            # within a number of tries for weights which (almost) never favour the target
+            for _ in range(MAX_REDRAWS):
+                sides = {polarity: _draw_factors(rng, polarity_factors, density)
+                         for polarity, polarity_factors in factors.items()}
+                pi_heavier = _weight(sides[decision_enum.pi], weights) > _weight(sides[decision_enum.delta], weights)
+                decision = decision_enum.pi if pi_heavier else decision_enum.delta
+                if decision == target:
+                    break
+            case = _make_case(rng, sides, decision, reason_size, weights)
+
+        if len(pool) < pool_size:
+            pool.append(case)
+        else:
+            slot = rng.randrange(count + 1)
+            if slot < pool_size:
+                pool[slot] = case
+        yield case
+
+
+def generate_case_base(n_cases, empty_sides=False, **kwargs):
+    """
+    @param n_cases: number of cases
+    @param empty_sides: see CaseBase
+    @param kwargs: the parameters of iter_synthetic_cases
+    @return: a CaseBase of the synthetic cases, built with CaseBase.from_cases_bulk
+    """
+    return CaseBase.from_cases_bulk(list(iter_synthetic_cases(n_cases, **kwargs)), empty_sides)
+
+
+def write_synthetic_cases(path, n_cases, **kwargs):
+    """
+    @param path: a YAML or JSON Lines file to write the cases to, in the schema of Case.from_dict
+    @param n_cases: number of cases
+    @param kwargs: the parameters of iter_synthetic_cases
+    The cases are written as they are generated, so they need not fit in memory
+    """
+    write_cases(iter_synthetic_cases(n_cases, **kwargs), path)
+
+
+def _draw_factors(rng, polarity_factors, density):
+    drawn = [factor for factor in polarity_factors if rng.random() < density]
+    return drawn or [rng.choice(polarity_factors)]
+
+
+def _weight(polarity_factors, weights):
+    return sum(weights[factor] for factor in polarity_factors)
+
+
+def _make_case(rng, sides, decision, reason_size, weights):
+    winning = sides[decision]
+    if reason_size is None:
+        reason = winning
+    else:
+        smallest, largest = reason_size
+        size = min(len(winning), rng.randint(max(1, smallest), max(1, smallest, largest)))
+        shuffled = rng.sample(winning, len(winning))
+        defeated_weight = _weight(sides[decision_enum.delta if decision == decision_enum.pi else decision_enum.pi],
+                                  weights)
+        while _weight(shuffled[:size], weights) <= defeated_weight:
+            size += 1
+        reason = shuffled[:size]
+    return Case(frozenset(sides[decision_enum.pi]), frozenset(sides[decision_enum.delta]), decision,
+                frozenset(reason))
+
+
+def _conflicting_case(rng, earlier, factors, density, reason_size):
+    # A case with the other decision conflicts with the earlier case when its reason is a subset of the earlier
+    # defeated factors and its defeated factors are a superset of the earlier reason, see
+    # PriorityOrder.get_incons_pairs_bits. The earlier reason is kept and the new reason drawn from the earlier
+    # defeated factors, both with random factors added, and the reason is the new case's whole side when
+    # reason_size is None, so the new side is only drawn from the earlier defeated factors.
+    decision = decision_enum.delta if earlier.decision == decision_enum.pi else decision_enum.pi
+    defeated = list(earlier.reason | frozenset(_draw_factors(rng, factors[earlier.decision], density)))
+    candidates = sorted(earlier.defeated, key=lambda factor: factor.name)
+    if reason_size is None:
+        winning = _draw_factors(rng, candidates, density)
+        reason = winning
+    else:
+        smallest, largest = reason_size
+        size = min(len(candidates), rng.randint(max(1, smallest), max(1, smallest, largest)))
+        reason = rng.sample(candidates, size)
+        winning = list(set(reason) | set(_draw_factors(rng, factors[decision], density)))
+    return Case(frozenset(winning if decision == decision_enum.pi else defeated),
+                frozenset(defeated if decision == decision_enum.pi else winning), decision, frozenset(reason))
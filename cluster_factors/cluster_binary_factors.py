@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+from cluster_factors.factor_statistics import FactorStatistics, RowReservoir
+
 """
 This modules contains methods for clustering binary factors in an unannotated dataset based on 
 different clustering strategies
@@ -10,6 +12,9 @@ different clustering strategies
 3. Random 
 4. Random with undecided (i.e. this will discard some factors from the decision making process)
 
+The chunked variants take an iterable of dataframes instead, e.g. pd.read_csv(path, chunksize=...),
+so datasets larger than memory can be clustered a chunk at a time.
+
 Each of these functions receives a dataframe with a set of factors marked with true and false
 if they contribute to the row's argument and a decision column. 
 
@@ -31,27 +36,43 @@ def reduce_df(df):
     return filtered_df
 
 
-def cluster_factors_corr(df, y_name):
+def assign_polarities(columns, scores, threshold=0):
+    """
+    @param columns: the factor names
+    @param scores: array of the score of each factor, positive for pi and negative for delta
+    @param threshold: the score must be over threshold for pi, and under -threshold for delta
+    Returns: a dictionary of factor names and their polarities, undecided otherwise (or when the score is NaN)
+    """
+    scores = np.asarray(scores, dtype=float)
+    polarities = np.where(scores > threshold, "pi", np.where(scores < -threshold, "delta", "un"))
+    return dict(zip(columns, polarities.tolist()))
+
+
+def cluster_factors_corr(df, y_name, threshold=0.1, statistics=None):
     """
     Clusters the factors (column names) in the dataset by the correlation of
     columns with a certain outcome
     Returns: a dictionary of factor names and their polarities clustered using correlations
     NaN - value only present in one of the rows
+
+    The point-biserial correlation of every column with y is computed from per outcome column sums
+    (see FactorStatistics) rather than from the full correlation matrix of the dataset.
+    A factor is pi when its correlation is over threshold and delta when it is under -threshold.
+    statistics can be given instead of df, e.g. accumulated over the chunks of a dataset.
     """
-    # take the correlations with y
-    cor_dict = zip(df.columns, df.corr()[y_name].astype(float))
-    factors = {key: "pi" if value > 0.1 else ("delta" if value < -0.1 else "un") for key, value in cor_dict}
-    factors.pop(y_name)
-    return factors
+    if statistics is None:
+        statistics = FactorStatistics.from_dataframe(df, y_name)
+    return assign_polarities(statistics.columns, statistics.correlations(), threshold)
 
 
-def cluster_factors_voting(df, y_name):
+def cluster_factors_voting(df, y_name, threshold=0):
     """
     Clusters the factors (column names) in the dataset with a voting mechanism,
     where a factor which appears in the dataset with a certain outcome more times is assigned that polarity.
     Returns: a dictionary of factor names and their polarities clustered using voting.
 
     The dataframe needs to be balanced between the two classes, otherwise this will favour the more prominent class.
+    A factor is assigned a polarity when it has more than threshold votes more for it than for the other.
     """
     pi_samples = df[df[y_name] == True]
     delta_samples = df[df[y_name] == False]
@@ -60,19 +81,12 @@ def cluster_factors_voting(df, y_name):
     delta_samples = delta_samples.sample(n=min_samples, random_state=42)
     balanced_df = pd.concat([pi_samples, delta_samples])
 
-    # Count true votes for "pi" and "delta" classes separately
-    true_pi_votes = {column: (balanced_df[column] & (balanced_df[y_name] == True)).sum() for column in
-                     balanced_df.columns}
-    true_delta_votes = {column: (balanced_df[column] & (balanced_df[y_name] == False)).sum() for column in
-                        balanced_df.columns}
+    # Count true votes for "pi" and "delta" classes separately, for all columns at once
+    statistics = FactorStatistics.from_dataframe(balanced_df, y_name)
+    true_pi_votes, true_delta_votes = statistics.votes()
 
     # Determine the polarity based on the majority of votes
-    factors = {key: "pi" if true_pi_votes[key] > true_delta_votes[key] else
-    ("delta" if true_pi_votes[key] < true_delta_votes[key] else "un")
-               for key in balanced_df.columns}
-
-    factors.pop(y_name)
-    return factors
+    return assign_polarities(statistics.columns, true_pi_votes - true_delta_votes, threshold)
 
 
 def cluster_factors_rand(df, y_name):
@@ -99,3 +113,63 @@ def cluster_factors_rand_un(df, y_name):
     factors.pop(y_name)
 
     return factors
+
+
+def cluster_factors_corr_chunked(chunks, y_name, threshold=0.1):
+    """
+    Clusters the factors of a dataset given as chunks by correlation, as cluster_factors_corr would the whole dataset.
+    Only the per outcome column sums (see FactorStatistics) are kept between chunks.
+    Returns: a dictionary of factor names and their polarities clustered using correlations
+    """
+    statistics = None
+    for chunk in chunks:
+        if statistics is None:
+            statistics = FactorStatistics([column for column in chunk.columns if column != y_name])
+        statistics.update(chunk, y_name)
+    if statistics is None:
+        raise ValueError("no chunks to cluster")
+    return cluster_factors_corr(None, y_name, threshold, statistics)
+
+
+def cluster_factors_voting_chunked(chunks, y_name, threshold=0, sample_size=100000, seed=42):
+    """
+    Clusters the factors of a dataset given as chunks with the voting mechanism of cluster_factors_voting.
+    The balanced sample is drawn with a reservoir of up to sample_size rows per outcome, then the same number of
+    rows is taken from each, so only the reservoirs are kept in memory. Factor columns are taken as true when nonzero.
+    Returns: a dictionary of factor names and their polarities clustered using voting.
+    """
+    rng = np.random.default_rng(seed)
+    columns, reservoirs = None, None
+    for chunk in chunks:
+        if columns is None:
+            columns = [column for column in chunk.columns if column != y_name]
+            reservoirs = [RowReservoir(sample_size, len(columns), rng) for _ in range(2)]
+        y = chunk[y_name].to_numpy(dtype=bool)
+        rows = chunk[columns].to_numpy(dtype=bool)
+        reservoirs[0].add(rows[~y])
+        reservoirs[1].add(rows[y])
+    if reservoirs is None:
+        raise ValueError("no chunks to cluster")
+
+    min_samples = min(len(reservoir) for reservoir in reservoirs)
+    delta_votes, pi_votes = (reservoir.sample(min_samples).sum(axis=0) for reservoir in reservoirs)
+    return assign_polarities(columns, pi_votes.astype(float) - delta_votes, threshold)
+
+
+def cluster_factors_chunked(chunks, y_name, cluster_type="corr", **kwargs):
+    """
+    Clusters the factors of a dataset given as chunks with the chosen method, "corr", "vote", "rand_un" or "rand".
+    The random methods only need the columns, which are taken from the first chunk.
+    Raises ValueError when there are no chunks.
+    Returns: a dictionary of factor names and their polarities
+    """
+    if cluster_type == "corr":
+        return cluster_factors_corr_chunked(chunks, y_name, **kwargs)
+    elif cluster_type == "vote":
+        return cluster_factors_voting_chunked(chunks, y_name, **kwargs)
+    first_chunk = next(iter(chunks), None)
+    if first_chunk is None:
+        raise ValueError("no chunks to cluster")
+    if cluster_type == "rand_un":
+        return cluster_factors_rand_un(first_chunk, y_name)
+    return cluster_factors_rand(first_chunk, y_name)
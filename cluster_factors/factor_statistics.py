@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+"""
+Sufficient statistics of the factor columns of a dataset for each outcome, from which the clustering methods
+of cluster_binary_factors are computed.
+For each outcome (false, true) this keeps the number of rows, and the sum and sum of squares of every column,
+which is all the point-biserial correlation of a column with the outcome and the votes of a column need.
+The statistics are summed a block of rows at a time, so they can be accumulated over chunks of a dataset,
+and sparse columns are summed from their stored values only.
+"""
+
+
+class FactorStatistics:
+    """
+    Per outcome counts, column sums and column sums of squares, with outcome false in row 0 and true in row 1
+    e.g. for y = [1, 0, 1] and a column f = [1, 1, 0]
+    counts = [1, 2], sums[:, f] = [1, 1], square_sums[:, f] = [1, 1]
+    """
+
+    # number of cells densified at a time
+    BLOCK_CELLS = 2 ** 22
+
+    def __init__(self, columns):
+        """
+        @param columns: the names of the factor columns
+        """
+        self.columns = list(columns)
+        self.counts = np.zeros(2, dtype=np.int64)
+        self.sums = np.zeros((2, len(self.columns)))
+        self.square_sums = np.zeros((2, len(self.columns)))
+
+    @classmethod
+    def from_dataframe(cls, df, y_name):
+        """
+        @param df: DataFrame of factor columns and an outcome column
+        @param y_name: the outcome column, true or false (1 or 0)
+        @return: the statistics of every column but the outcome
+        """
+        statistics = cls([column for column in df.columns if column != y_name])
+        statistics.update(df, y_name)
+        return statistics
+
+    def update(self, df, y_name):
+        """
+        @param df: DataFrame with the statistics' columns and the outcome column, e.g. the next chunk of a dataset
+        @param y_name: the outcome column
+        Adds the rows of df to the statistics
+        """
+        y = df[y_name].to_numpy(dtype=bool)
+        outcomes = np.stack([~y, y]).astype(np.float64)
+        counts = np.array([len(y) - int(y.sum()), int(y.sum())])
+        self.counts += counts
+
+        sparse, dense = [], []
+        for k, column in enumerate(self.columns):
+            (sparse if isinstance(df[column].dtype, pd.SparseDtype) else dense).append(k)
+
+        for k in sparse:
+            self._update_sparse(k, df[self.columns[k]].array, y, counts)
+
+        # dense columns are summed for both outcomes at once as a matrix product, a block of rows at a time
+        if dense:
+            frame = df[[self.columns[k] for k in dense]]
+            step = max(1, self.BLOCK_CELLS // len(dense))
+            for start in range(0, len(df), step):
+                block = frame.iloc[start:start + step].to_numpy(dtype=np.float64)
+                self.sums[:, dense] += outcomes[:, start:start + step] @ block
+                self.square_sums[:, dense] += outcomes[:, start:start + step] @ (block * block)
+
+    def _update_sparse(self, k, array, y, counts):
+        # values which are not stored are the fill value, so the stored values are summed and the rest counted
+        values = np.asarray(array.sp_values, dtype=np.float64)
+        fill = 0.0 if pd.isna(array.fill_value) else float(array.fill_value)
+        stored_y = y[array.sp_index.indices]
+        for outcome, mask in ((0, ~stored_y), (1, stored_y)):
+            unstored = counts[outcome] - int(mask.sum())
+            self.sums[outcome, k] += values[mask].sum() + fill * unstored
+            self.square_sums[outcome, k] += (values[mask] ** 2).sum() + fill * fill * unstored
+
+    def correlations(self):
+        """
+        @return: array of the Pearson correlation of each column with the outcome, the point-biserial correlation
+                 for a binary outcome, NaN for a column or outcome with no variance (as DataFrame.corr gives)
+        """
+        n = self.counts.sum()
+        sum_x = self.sums.sum(axis=0)
+        sum_xx = self.square_sums.sum(axis=0)
+        sum_xy = self.sums[1]
+        sum_y = self.counts[1]  # the outcome is 0 or 1, so it is its own square
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (n * sum_xy - sum_x * sum_y) / np.sqrt((n * sum_xx - sum_x ** 2) * (n * sum_y - sum_y ** 2))
+
+    def votes(self):
+        """
+        @return: arrays of the votes of each column for pi and for delta, the sum of the column over the rows with
+                 a true outcome and over the rows with a false outcome
+        """
+        return self.sums[1], self.sums[0]
+
+
+class RowReservoir:
+    """
+    Uniform random sample of up to capacity rows of a stream of boolean rows, kept by reservoir sampling
+    (Algorithm R) a chunk of rows at a time, so the sample of a dataset larger than memory can be balanced.
+    """
+
+    def __init__(self, capacity, n_columns, rng):
+        """
+        @param capacity: maximum number of rows kept
+        @param n_columns: number of columns of the rows
+        @param rng: numpy random Generator, shared by the reservoirs of a clustering for reproducibility
+        """
+        self.capacity = capacity
+        self.rows = np.zeros((capacity, n_columns), dtype=bool)
+        self.seen = 0
+        self.rng = rng
+
+    def add(self, rows):
+        """
+        @param rows: boolean matrix of the next rows of the stream
+        """
+        # rows which arrive while the reservoir is not full are all kept
+        free = min(max(self.capacity - self.seen, 0), len(rows))
+        self.rows[self.seen:self.seen + free] = rows[:free]
+
+        # after that the t-th row seen replaces a random kept row with probability capacity / (t + 1)
+        positions = np.arange(self.seen + free, self.seen + len(rows))
+        slots = (self.rng.random(len(positions)) * (positions + 1)).astype(np.int64)
+        replace = slots < self.capacity
+        # for a slot chosen twice in the chunk the later row wins, as it would one row at a time
+        self.rows[slots[replace]] = rows[free:][replace]
+        self.seen += len(rows)
+
+    def __len__(self):
+        return min(self.seen, self.capacity)
+
+    def sample(self, n):
+        """
+        @param n: number of rows, at most len(self)
+        @return: n of the kept rows chosen at random, a uniform random sample of n rows of the stream
+        """
+        return self.rows[self.rng.choice(len(self), size=n, replace=False)]
@@ -1,13 +1,12 @@
 from briefcase.enums import decision_enum
 from briefcase.case_base import CaseBase
 from briefcase.case import Case
+from briefcase.experiments import run_admissibility_trials
 import pandas as pd
 from cluster_factors.cluster_binary_factors import cluster_factors_voting, cluster_factors_rand_un, \
     cluster_factors_corr, cluster_factors_rand, reduce_df
 import yaml
 import math
-from collections import defaultdict
-import statistics
 import random
 
 """
@@ -200,52 +199,23 @@ def balanced_shuffle_data(data, repeats=50):
     return samples
 
 
-def test_admit_bf_incons(shuffles):
-    # Set the seed for reproducibility
-    scores = []
-    powers = []
-    cases_sizes = []
-
-    def add_dict(dic, factors):
-        for factor in factors:
-            dic[factor.name] += 1
-        return dic
-
-    pi_df = {}
-    delta_df = {}
-
-    for k, temp_data in enumerate(shuffles):
-        cb = CaseBase([])
-        score = 0
-        pi_factors = defaultdict(int)
-        delta_factors = defaultdict(int)
-        cases_sizes.append(len(temp_data))
-        for i in range(len(temp_data)):
-            new_case = Case.from_dict(temp_data[i])
-            polarity = new_case.decision
-            if not cb.add_case(new_case, "NO"):
-                score = i
-                cb_power = cb.order.PD.cb_power()
-                if polarity == decision_enum.pi:
-                    pi_factors = add_dict(pi_factors, new_case.reason)
-                    delta_factors = add_dict(delta_factors, new_case.defeated())
-                else:
-                    pi_factors = add_dict(pi_factors, new_case.defeated())
-                    delta_factors = add_dict(delta_factors, new_case.reason)
-                break
-        powers.append(cb_power)
-        scores.append(score)
-        pi_df[k] = pi_factors
-        delta_df[k] = delta_factors
-        print(f"{k}: The number of cases we can admit before we create an inconsistency {score}")
-        print(f"{k}: The power of case base before we create an inconsistency {cb_power}")
-        print(f"{k}: The pi factors on the first inconsistent case {len(pi_factors)}")
-        print(f"{k}: The delta factors on the first inconsistent case {len(delta_factors)}")
+def test_admit_bf_incons(shuffles, workers=None):
+    results = run_admissibility_trials([[Case.from_dict(c) for c in temp_data] for temp_data in shuffles],
+                                       "NO", workers)
+    scores, powers = results.scores, results.powers
+    pi_df = dict(enumerate(results.pi_factors))
+    delta_df = dict(enumerate(results.delta_factors))
+
+    for k in range(len(results)):
+        print(f"{k}: The number of cases we can admit before we create an inconsistency {scores[k]}")
+        print(f"{k}: The power of case base before we create an inconsistency {powers[k]}")
+        print(f"{k}: The pi factors on the first inconsistent case {len(pi_df[k])}")
+        print(f"{k}: The delta factors on the first inconsistent case {len(delta_df[k])}")
         print()
 
-    avg = round(sum(scores) / len(scores))
-    avg_cases = round(sum(cases_sizes) / len(cases_sizes))
-    std_dev = round(statistics.stdev(scores), 2)
+    avg = results.avg()
+    avg_cases = round(sum(results.sizes) / len(results.sizes))
+    std_dev = results.std_dev()
     print(f"Average number of cases in case base: {avg_cases}")
     print(f"Average cases before inconsistency: {avg}")
     print(f"Standard deviation: {std_dev}")
@@ -6,6 +6,8 @@ from briefcase.case_base import CaseBase
 from briefcase.priority_order import PriorityOrder
 from collections import Counter
 
+from briefcase.enums import incons_enum
+
 
 # Define a fixture to load test cases from the YAML file
 @pytest.fixture
@@ -22,7 +24,8 @@ def test_cases():
         "no_new",
         "no_involvement",
         "horty",
-        "no_corruption"
+        "no_corruption",
+        "mrd"
     ],
 )
 def test_is_case_admissible(test_cases, test_case_name):
@@ -42,8 +45,83 @@ def test_is_case_admissible(test_cases, test_case_name):
     cb1 = CaseBase(cases)
     fails_results = []
 
+    constraints = cb1.order.admissibility_constraints
     for case in adds:
+        # the frozenset api gives the same answers as the bitsets it is encoded to
+        admissible = constraints.is_case_admissible(case.reason, case.defeated, incons_enum[constraint])
+        assert admissible == constraints.is_case_admissible_bits(case.reason_bits, case.defeated_bits,
+                                                                 incons_enum[constraint])
         if not cb1.add_case(case, constraint):
+            assert not admissible
             fails_results.append(case)
 
-    assert fails == fails_results
\ No newline at end of file
+    assert fails == fails_results
+
+
+@pytest.fixture
+def order_test_cases():
+    test_data_path = Path(__file__).parent / 'test_data' / 'test_priority_order.yaml'
+    with open(test_data_path, 'r') as file:
+        return yaml.safe_load(file)
+
+
+@pytest.mark.parametrize(
+    "test_case_name",
+    [
+        "simple_big",
+        "subset_big",
+        "multi_defeated_big",
+        "mega_case_10",
+        "combined_factors"
+    ],
+)
+def test_minimal_rd_pairs(order_test_cases, test_case_name):
+    cases = [Case.from_dict(c) for c in order_test_cases[test_case_name]]
+    for half in range(len(cases)):
+        cb1 = CaseBase(cases[:half])
+        for case in cases:
+            # compare against the relevant differences from every case with the same decision
+            distances = [len(case.relevant_diff_from(other)) for other in cb1.cases if other.decision == case.decision]
+            for max_distance in range(4):
+                distance, pairs = cb1.order.get_minimal_rd_pairs(case.reason, case.defeated, max_distance)
+                within = [d for d in distances if d <= max_distance]
+                assert distance == (min(within) if within else None)
+                assert set(pairs) == {
+                    (other.reason, other.defeated) for other in cb1.cases
+                    if other.decision == case.decision and len(case.relevant_diff_from(other)) == distance}
+
+            # with a threshold of 0 the new case must be forced by a case, as for NO_NEW
+            cb1.order.admissibility_constraints.mrd_threshold = 0
+            assert cb1.order.admissibility_constraints.is_case_admissible(
+                case.reason, case.defeated, incons_enum.MRD) == cb1.order.is_existing_claim(
+                case.reason, case.defeated)
+
+
+@pytest.mark.parametrize("empty_sides", [False, True])
+def test_mrd_empty_side(empty_sides):
+    # a precedent with an empty side is one relevant difference away from the new case
+    cb1 = CaseBase([], empty_sides)
+    assert cb1.add_case(Case.from_dict({"pi": ["p1"], "delta": [], "decision": "pi", "reason": ["p1"]}))
+    new_case = Case.from_dict({"pi": ["p1"], "delta": ["d1"], "decision": "pi", "reason": ["p1"]})
+    assert cb1.order.get_minimal_rd_pairs(new_case.reason, new_case.defeated, 1) == (
+        1, [(new_case.reason, frozenset())])
+    assert cb1.add_case(new_case, "MRD")
+
+    cases = [Case.from_dict(c) for c in [
+        {"pi": ["p1", "p2"], "delta": [], "decision": "delta", "reason": []},
+        {"pi": ["p2"], "delta": ["d1", "d2"], "decision": "delta", "reason": ["d1"]},
+        {"pi": [], "delta": ["d2"], "decision": "pi", "reason": []},
+        {"pi": ["p2"], "delta": ["d1"], "decision": "pi", "reason": ["p2"]},
+        {"pi": ["p2"], "delta": ["d3"], "decision": "delta", "reason": ["d3"]},
+    ]]
+    for case in cases:
+        cb1.add_case(case)
+    for case in cases + [new_case]:
+        distances = [len(case.relevant_diff_from(other)) for other in cb1.cases if other.decision == case.decision]
+        for max_distance in range(4):
+            distance, pairs = cb1.order.get_minimal_rd_pairs(case.reason, case.defeated, max_distance)
+            within = [d for d in distances if d <= max_distance]
+            assert distance == (min(within) if within else None)
+            assert set(pairs) == {
+                (other.reason, other.defeated) for other in cb1.cases
+                if other.decision == case.decision and len(case.relevant_diff_from(other)) == distance}
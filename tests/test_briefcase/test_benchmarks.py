@@ -0,0 +1,63 @@
+import json
+import random
+
+from briefcase.benchmarks import compare_results, find_datasets, latency_stats, main
+from briefcase.case import Case
+from briefcase.case_base import CaseBase
+from briefcase.case_stream import write_cases
+
+
+def random_cases(n, seed=3):
+    rng = random.Random(seed)
+    cases = []
+    for _ in range(n):
+        pi = rng.sample(["p1", "p2", "p3", "p4"], rng.randint(1, 3))
+        delta = rng.sample(["d1", "d2", "d3", "d4"], rng.randint(1, 3))
+        decision = rng.choice(["pi", "delta"])
+        cases.append(Case.from_dict({"pi": pi, "delta": delta, "decision": decision,
+                                     "reason": pi if decision == "pi" else delta}))
+    return cases
+
+
+def test_latency_stats():
+    stats = latency_stats([0.1 * k for k in range(1, 11)])
+    assert stats["calls"] == 10
+    assert stats["p50"] == 0.5
+    assert stats["p90"] == 0.9
+    assert stats["max"] == 1.0
+    assert abs(stats["throughput"] - 10 / 5.5) < 1e-9
+    assert latency_stats([]) == {"calls": 0}
+
+
+def test_benchmark_run(tmp_path):
+    data = tmp_path / "telco" / "data"
+    data.mkdir(parents=True)
+    cases = random_cases(30)
+    write_cases(cases, data / "telco-corr-test-0.5-False.yaml")
+
+    assert find_datasets(tmp_path) == [data / "telco-corr-test-0.5-False.yaml"]
+    assert find_datasets(tmp_path, "mushrooms-*") == []
+
+    output = tmp_path / "results.json"
+    assert main(["--data-dir", str(tmp_path), "--constraints", "NO", "ALL", "--repeats", "2",
+                 "--output", str(output)]) == 0
+    with open(output) as file:
+        report = json.load(file)
+
+    results = {result["incons"]: result for result in report["results"]}
+    assert set(results) == {"NO", "ALL"}
+    for incons, result in results.items():
+        cb = CaseBase([])
+        cb.add_cases(cases, incons)
+        assert result["cases"] == result["add_case"]["calls"] == 30
+        assert result["admitted"] == len(cb.cases)
+        assert result["count_tainted_cases"]["calls"] == result["cb_power"]["calls"] == 2
+        assert result["peak_memory"] > 0
+
+    # a run against itself has nothing slower, one with every throughput halved has everything slower
+    assert compare_results(report, report) == []
+    slower = json.loads(json.dumps(report))
+    for result in slower["results"]:
+        for entry_point in ("add_case", "is_consistent", "count_tainted_cases", "cb_power"):
+            result[entry_point]["throughput"] /= 2
+    assert len(compare_results(report, slower)) == 8
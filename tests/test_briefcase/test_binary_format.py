@@ -0,0 +1,62 @@
+from pathlib import Path
+import pytest
+import yaml
+
+from briefcase.binary_format import load_cases, save_cases
+from briefcase.case import Case
+from briefcase.case_base import CaseBase
+
+
+# Define a fixture to load test cases from the YAML file
+@pytest.fixture
+def test_cases():
+    test_data_path = Path(__file__).parent / 'test_data' / 'test_priority_order.yaml'
+    with open(test_data_path, 'r') as file:
+        return yaml.safe_load(file)
+
+
+@pytest.mark.parametrize(
+    "test_case_name",
+    [
+        "simple_big",
+        "multi_defeated_big",
+        "mega_case_10",
+        "combined_factors"
+    ],
+)
+@pytest.mark.parametrize("mmap", [True, False])
+def test_round_trip(test_cases, test_case_name, mmap, tmp_path):
+    dicts = test_cases[test_case_name]
+    cases = [Case.from_dict(c) for c in dicts]
+    save_cases(cases, tmp_path / "cases.bin")
+    loaded = load_cases(tmp_path / "cases.bin", mmap)
+
+    assert len(loaded) == len(cases)
+    assert list(loaded) == cases
+    assert loaded[-1] == cases[-1]
+    # round trips against the dictionary schema of Case.from_dict
+    for c, case in zip(dicts, loaded):
+        assert Case.from_dict(case.to_dict()) == Case.from_dict(c)
+
+
+def test_case_base_save_load(test_cases, tmp_path):
+    cases = [Case.from_dict(c) for c in test_cases["combined_factors"]]
+    cb1 = CaseBase(cases)
+    cb1.save(tmp_path / "cb.bin")
+    cb2 = CaseBase.load(tmp_path / "cb.bin")
+    assert cb1.cases == cb2.cases
+    assert cb1.is_cb_consistent() == cb2.is_cb_consistent()
+
+
+def test_empty_and_bad_file(tmp_path):
+    save_cases([], tmp_path / "empty.bin")
+    assert len(load_cases(tmp_path / "empty.bin")) == 0
+
+    # a case with no factors at the end of the file
+    cases = [Case.from_dict({"pi": ["p1"], "delta": [], "decision": "pi", "reason": ["p1"]}), Case()]
+    save_cases(cases, tmp_path / "sides.bin")
+    assert list(load_cases(tmp_path / "sides.bin")) == cases
+
+    (tmp_path / "bad.bin").write_bytes(b"not a case base")
+    with pytest.raises(ValueError):
+        load_cases(tmp_path / "bad.bin")
@@ -31,3 +31,20 @@ def test_relevant_differences(test_cases, test_case_name):
 
 
 
+
+
+def test_immutable_and_picklable():
+    import pickle
+    factor = Factor("ate dinner", decision_enum.pi)
+    assert factor is Factor("ate dinner", decision_enum.pi)
+    case = Case.from_dict({"pi": ["ate dinner"], "delta": ["no homework"], "decision": "pi",
+                           "reason": ["ate dinner"]})
+    assert case.defeated == frozenset({Factor("no homework", decision_enum.delta)})
+    with pytest.raises(AttributeError):
+        case.decision = decision_enum.delta
+    with pytest.raises(AttributeError):
+        factor.name = "skipped dinner"
+    copy = pickle.loads(pickle.dumps(case))
+    assert copy == case and hash(copy) == hash(case)
+    assert next(iter(copy.reason)) is factor
+    assert len({case, copy}) == 1
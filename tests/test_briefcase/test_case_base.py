@@ -58,4 +58,295 @@ def test_add_wrong_incons_enum(test_cases, test_case_name):
     cases = [Case.from_dict(c) for c in new_cases]
     cb1 = CaseBase()
     with pytest.raises(KeyError):
-        cb1.add_cases(cases, "random-wrong")
\ No newline at end of file
+        cb1.add_cases(cases, "random-wrong")
+
+@pytest.mark.parametrize(
+    "test_case_name",
+    [
+        "test_add_cases",
+        "simple_small",
+    ],
+)
+def test_tainted_cases(test_cases, test_case_name):
+    cs = test_cases[test_case_name]
+    cb1 = CaseBase()
+    for c in cs:
+        cb1.add_case(Case.from_dict(c))
+        # compare against checking every case in the case base
+        tainted = [case for case in cb1.cases if not cb1.is_consistent_with(case)]
+        assert cb1.count_tainted_cases() == len(tainted)
+        assert sorted(map(repr, cb1.tainted_cases())) == sorted(map(repr, tainted))
+
+
+@pytest.fixture
+def order_test_cases():
+    test_data_path = Path(__file__).parent / 'test_data' / 'test_priority_order.yaml'
+    with open(test_data_path, 'r') as file:
+        return yaml.safe_load(file)
+
+
+@pytest.mark.parametrize(
+    "test_case_name",
+    [
+        "simple_big",
+        "distractor_small",
+        "subset_big",
+        "multi_defeated_big",
+        "mega_case_10",
+        "combined_factors"
+    ],
+)
+def test_from_cases_bulk(order_test_cases, test_case_name):
+    cases = [Case.from_dict(c) for c in order_test_cases[test_case_name]]
+    cases = cases + cases[:2]  # repeated pairs are only indexed once
+    cb1 = CaseBase(cases)
+    cb2 = CaseBase.from_cases_bulk(cases)
+    assert cb1.cases == cb2.cases
+    assert cb1.order.order == cb2.order.order
+    assert cb1.order.bit_order == cb2.order.bit_order
+    assert cb1.order.incons_pairs == cb2.order.incons_pairs
+    assert cb1.order.PD.factor_list == cb2.order.PD.factor_list
+    assert cb1.count_tainted_cases() == cb2.count_tainted_cases()
+    assert cb1.is_cb_consistent() == cb2.is_cb_consistent()
+
+
+@pytest.mark.parametrize(
+    "test_case_name",
+    [
+        "simple_big",
+        "multi_defeated_big",
+        "mega_case_10",
+        "combined_factors"
+    ],
+)
+def test_fork(order_test_cases, test_case_name):
+    cases = [Case.from_dict(c) for c in order_test_cases[test_case_name]]
+    half = len(cases) // 2
+    cb1 = CaseBase(cases[:half])
+    snapshot = cb1.fork()
+    fork = cb1.fork()
+    fork.add_cases(cases[half:])
+    cb1.add_case(cases[-1])
+    for cb, expected in ((cb1, CaseBase(cases[:half] + cases[-1:])), (fork, CaseBase(cases)),
+                         (snapshot, CaseBase(cases[:half])), (cb1.fork(), cb1)):
+        assert cb.cases == expected.cases
+        assert cb.order.order == expected.order.order
+        assert cb.order.defeated_factor_index == expected.order.defeated_factor_index
+        assert cb.order.bit_order == expected.order.bit_order
+        assert sorted(cb.order.defeat_index.supersets(0)) == sorted(expected.order.defeat_index.supersets(0))
+        assert cb.order.PD.factor_list == expected.order.PD.factor_list
+        assert cb.count_tainted_cases() == expected.count_tainted_cases()
+        assert cb.tainted_cases() == expected.tainted_cases()
+
+
+@pytest.mark.parametrize(
+    "test_case_name",
+    [
+        "simple_big",
+        "distractor_small",
+        "subset_big",
+        "multi_defeated_big",
+        "mega_case_10",
+        "combined_factors"
+    ],
+)
+def test_remove_case(order_test_cases, test_case_name):
+    cases = [Case.from_dict(c) for c in order_test_cases[test_case_name]]
+    cases = cases + cases[:2]  # repeated pairs stay in the order until their last case is removed
+    for start in range(len(cases)):
+        remaining = cases[start:] + cases[:start]
+        cb1 = CaseBase(remaining)
+        snapshot = cb1.fork()
+        while remaining:
+            cb1.remove_case(remaining.pop(0))
+            cb2 = CaseBase(remaining)
+            assert cb1.cases == cb2.cases
+            assert cb1.order.order == cb2.order.order
+            assert cb1.order.defeated_factor_index == cb2.order.defeated_factor_index
+            assert cb1.order.bit_order == cb2.order.bit_order
+            assert cb1.order.defeated_bits_index == cb2.order.defeated_bits_index
+            assert sorted(cb1.order.defeat_index.supersets(0)) == sorted(cb2.order.defeat_index.supersets(0))
+            assert cb1.order.incons_pairs == cb2.order.incons_pairs
+            assert cb1.order.PD.factor_list == cb2.order.PD.factor_list
+            assert cb1.count_tainted_cases() == cb2.count_tainted_cases()
+        assert snapshot.cases == cases[start:] + cases[:start]
+    with pytest.raises(ValueError):
+        cb1.remove_case(cases[0])
+
+
+def test_remove_case_position(monkeypatch):
+    import random
+    from briefcase.synthetic import iter_synthetic_cases
+    cases = list(iter_synthetic_cases(2000, duplicate_rate=0.2, conflict_rate=0.05, seed=3))
+
+    # cases are removed as list.remove would remove them, in any order and with repeated cases
+    cb1, expected = CaseBase(cases), list(cases)
+    rng = random.Random(0)
+    for k in range(len(cases)):
+        case = rng.choice(expected)
+        cb1.remove_case(case)
+        expected.remove(case)
+        assert len(cb1) == len(expected)
+        if k % 97 == 0:
+            assert cb1.cases == expected
+    assert cb1.cases == []
+
+    # a removal compares the case with the cases of its pair only, wherever it is in the case base
+    comparisons = []
+    original_eq = Case.__eq__
+    monkeypatch.setattr(Case, "__eq__", lambda self, other: comparisons.append(1) or original_eq(self, other))
+    cb2 = CaseBase(cases)
+    counts = []
+    for case in (cb2.cases[0], cb2.cases[-1], cb2.cases[len(cases) // 2]):
+        bucket = len(cb2.cases_by_pair.get((case.reason_bits, case.defeated_bits)))
+        comparisons.clear()
+        cb2.remove_case(case)
+        counts.append(len(comparisons))
+        assert len(comparisons) <= 2 * bucket + 2
+    assert max(counts) < 50
+
+
+@pytest.mark.parametrize(
+    "test_case_name",
+    [
+        "simple_big",
+        "distractor_small",
+        "subset_big",
+        "multi_defeated_big",
+        "mega_case_10",
+        "combined_factors"
+    ],
+)
+def test_check_many(order_test_cases, test_case_name):
+    cases = [Case.from_dict(c) for c in order_test_cases[test_case_name]]
+    for half in range(len(cases)):
+        cb1 = CaseBase(cases[:half])
+        verdicts = cb1.check_many(cases)
+        assert [verdict for verdict, pairs in verdicts] == [cb1.is_consistent_with(case) for case in cases]
+        for case, (verdict, pairs) in zip(cases, verdicts):
+            assert set(pairs) == set(cb1.order.get_incons_pairs_with_case(case.reason, case.defeated))
+
+
+@pytest.mark.parametrize(
+    "test_case_name",
+    [
+        "simple_big",
+        "subset_big",
+        "multi_defeated_big",
+        "mega_case_10",
+        "combined_factors"
+    ],
+)
+def test_nearest_precedents(order_test_cases, test_case_name):
+    cases = [Case.from_dict(c) for c in order_test_cases[test_case_name]]
+    for half in range(len(cases)):
+        cb1 = CaseBase(cases[:half])
+        for case in cases:
+            distances = sorted(len(case.relevant_diff_from(other)) for other in cb1.cases)
+            for k in (1, 3, len(cases)):
+                nearest = cb1.nearest_precedents(case, k)
+                assert [len(difference) for precedent, difference in nearest] == distances[:k]
+                assert all(difference == case.relevant_diff_from(precedent) for precedent, difference in nearest)
+            assert sorted(map(id, cb1.binding_precedents(case))) == sorted(
+                id(other) for other in cb1.cases if not case.relevant_diff_from(other))
+
+
+@pytest.mark.parametrize("empty_sides", [False, True])
+def test_nearest_precedents_empty_side(empty_sides):
+    # cases with an empty side have no pair in the order, and are precedents all the same
+    cases = [Case.from_dict(c) for c in [
+        {"pi": ["p1", "p2"], "delta": [], "decision": "delta", "reason": []},
+        {"pi": ["p3"], "delta": ["d1", "d2"], "decision": "delta", "reason": ["d1"]},
+        {"pi": ["p1"], "delta": [], "decision": "pi", "reason": ["p1"]},
+        {"pi": [], "delta": ["d2"], "decision": "pi", "reason": []},
+        {"pi": ["p2"], "delta": ["d1"], "decision": "pi", "reason": ["p2"]},
+        {"pi": ["p1"], "delta": [], "decision": "pi", "reason": ["p1"]},
+    ]]
+    cb1 = CaseBase([], empty_sides)
+    for case in cases:
+        assert cb1.add_case(case)
+    assert cases[0] in cb1.binding_precedents(cases[0])
+    assert cb1.nearest_precedents(cases[0], 1)[0][1] == frozenset()
+
+    for removed in [None] + cases:
+        if removed is not None:
+            cb1.remove_case(removed)
+        for case in cases:
+            distances = sorted(len(case.relevant_diff_from(other)) for other in cb1.cases)
+            for k in (1, 3, len(cases)):
+                nearest = cb1.nearest_precedents(case, k)
+                assert [len(difference) for precedent, difference in nearest] == distances[:k]
+            assert len(cb1.binding_precedents(case)) == distances.count(0)
+    assert cb1.order.empty_side_counts == {decision_enum.pi: {}, decision_enum.delta: {}}
+
+
+@pytest.mark.parametrize(
+    "test_case_name",
+    [
+        "simple_big",
+        "subset_big",
+        "multi_defeated_big",
+        "mega_case_10",
+        "combined_factors"
+    ],
+)
+def test_forced_decision(order_test_cases, test_case_name):
+    cases = [Case.from_dict(c) for c in order_test_cases[test_case_name]]
+    facts = [Case(case.pi_factors, case.delta_factors) for case in cases]
+    facts += [Case(case.pi_factors, frozenset()) for case in cases]
+    facts += [Case(frozenset(), case.delta_factors) for case in cases]
+    cb1 = CaseBase([])
+    for case in cases + cases[::-1]:
+        # answers cached before the case is added must not be returned after it
+        for fact in facts:
+            forced = set()
+            for other in cb1.cases:
+                winning, losing = (fact.pi_factors, fact.delta_factors) if other.decision == decision_enum.pi \
+                    else (fact.delta_factors, fact.pi_factors)
+                if other.reason <= winning and losing <= other.defeated:
+                    forced.add(other.decision)
+            expected = forced.pop() if len(forced) == 1 else decision_enum.un
+            assert cb1.forced_decision(fact) == expected
+            assert cb1.forced_decision(fact.pi_factors | fact.delta_factors) == expected
+        if case in cb1.cases:
+            cb1.remove_case(case)
+        else:
+            cb1.add_case(case)
+
+
+def test_forced_decision_case_with_empty_side():
+    # a case with an empty side is not in the order, so adding it must clear the cached answers all the same
+    cb1 = CaseBase([Case.from_dict({"pi": ["p2"], "delta": ["d1"], "decision": "delta", "reason": ["d1"]})])
+    p1 = Factor("p1", decision_enum.pi)
+    assert cb1.forced_decision([p1]) == decision_enum.un
+    case = Case.from_dict({"pi": ["p1"], "delta": [], "decision": "pi", "reason": ["p1"]})
+    assert cb1.add_case(case)
+    assert cb1.forced_decision([p1]) == decision_enum.pi
+    cb1.remove_case(case)
+    assert cb1.forced_decision([p1]) == decision_enum.un
+
+
+def test_from_dataframe():
+    import pandas as pd
+    df = pd.DataFrame({
+        "p1": [True, True, False, True, True],
+        "p2": [False, True, True, False, False],
+        "d1": [True, False, True, True, True],
+        "d2": [False, False, True, False, False],
+        "u1": [True, True, True, True, True],
+        "outcome": [True, False, False, True, False],
+    })
+    factors = {"p1": "pi", "p2": "pi", "d1": "delta", "d2": "delta", "u1": "un"}
+    expected = [
+        {"pi": ["p1"], "delta": ["d1"], "decision": "pi", "reason": ["p1"]},
+        {"pi": ["p1", "p2"], "delta": [], "decision": "delta", "reason": []},
+        {"pi": ["p2"], "delta": ["d1", "d2"], "decision": "delta", "reason": ["d1", "d2"]},
+        {"pi": ["p1"], "delta": ["d1"], "decision": "pi", "reason": ["p1"]},
+        {"pi": ["p1"], "delta": ["d1"], "decision": "delta", "reason": ["d1"]},
+    ]
+    cb1 = CaseBase([Case.from_dict(c) for c in expected])
+    cb2 = CaseBase.from_dataframe(df, "outcome", factors)
+    assert cb1.cases == cb2.cases
+    assert cb1.order.order == cb2.order.order
+    assert cb1.order.incons_pairs == cb2.order.incons_pairs
+    assert cb1.count_tainted_cases() == cb2.count_tainted_cases() == 3
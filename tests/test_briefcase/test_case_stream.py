@@ -0,0 +1,46 @@
+from pathlib import Path
+import io
+import pytest
+import yaml
+
+from briefcase.case import Case
+from briefcase.case_base import CaseBase
+from briefcase.case_stream import iter_cases, iter_yaml_dicts, write_cases
+
+
+# Define a fixture to load test cases from the YAML file
+@pytest.fixture
+def test_cases():
+    test_data_path = Path(__file__).parent / 'test_data' / 'test_case_base.yaml'
+    with open(test_data_path, 'r') as file:
+        return yaml.safe_load(file)
+
+
+@pytest.mark.parametrize("loader", [yaml.SafeLoader, getattr(yaml, "CSafeLoader", yaml.SafeLoader)])
+def test_iter_yaml_dicts(loader):
+    documents = [
+        "",
+        "[]",
+        "- {pi: [p1], delta: [], decision: pi, reason: [p1]}\n- pi: [p1, 2]\n  delta: [d1]\n",
+        "- &one {pi: [p1], delta: [d1], decision: pi, reason: [p1]}\n- *one\n",
+    ]
+    for document in documents:
+        assert list(iter_yaml_dicts(io.StringIO(document), loader)) == (yaml.safe_load(document) or [])
+
+
+@pytest.mark.parametrize("suffix", [".yaml", ".jsonl"])
+def test_write_iter_cases(test_cases, suffix, tmp_path):
+    cases = [Case.from_dict(c) for c in test_cases["test_add_cases"]]
+    write_cases(cases, tmp_path / f"cases{suffix}")
+    assert list(iter_cases(tmp_path / f"cases{suffix}")) == cases
+
+
+def test_add_case_stream(test_cases, tmp_path):
+    with open(tmp_path / "cases.yaml", "w") as file:
+        yaml.dump(test_cases["test_add_cases"], file)
+    cb1 = CaseBase()
+    admitted = [added for case, added in cb1.add_case_stream(iter_cases(tmp_path / "cases.yaml"), "NO")]
+    cb2 = CaseBase()
+    assert admitted == [cb2.add_case(Case.from_dict(c), "NO") for c in test_cases["test_add_cases"]]
+    assert admitted == [True, True, False]
+    assert cb1.cases == cb2.cases
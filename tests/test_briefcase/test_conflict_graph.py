@@ -0,0 +1,77 @@
+from itertools import combinations
+
+import networkx as nx
+import pytest
+
+from briefcase.case_base import CaseBase
+from briefcase.synthetic import iter_synthetic_cases
+
+
+def check_conflicts(cb):
+    conflicts = cb.order.conflicts
+    assert set(conflicts.case_degrees) == cb.order.incons_pairs
+
+    incons = {}
+    for case in cb.cases:
+        pair = (case.reason_bits, case.defeated_bits)
+        incons[pair] = set(cb.order.get_incons_pairs_bits(*pair))
+    for case in cb.cases:
+        pair = (case.reason_bits, case.defeated_bits)
+        expected = sum(1 for other in cb.cases if (other.reason_bits, other.defeated_bits) in incons[pair])
+        assert cb.conflict_degree(case) == expected
+        assert conflicts.neighbours(pair) == incons[pair]
+
+    expected_components = nx.Graph()
+    expected_components.add_edges_from((pair, other) for pair, others in incons.items() for other in others)
+    assert sorted(map(sorted, conflicts.components())) == sorted(map(sorted, nx.connected_components(
+        expected_components)))
+    assert sorted(map(len, cb.conflict_components()), reverse=True) == [len(c) for c in cb.conflict_components()]
+    assert sum(map(len, cb.conflict_components())) == cb.count_tainted_cases()
+
+    graph = cb.conflict_graph()
+    assert sum(count for node, count in graph.nodes(data="count")) == cb.count_tainted_cases()
+    assert nx.is_directed_acyclic_graph(graph)
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_conflict_graph(bulk):
+    cases = list(iter_synthetic_cases(150, n_pi=12, n_delta=12, reason_size=(1, 3), duplicate_rate=0.2,
+                                      conflict_rate=0.05, seed=5))
+    cb = CaseBase.from_cases_bulk(cases[:100]) if bulk else CaseBase(cases[:100])
+    check_conflicts(cb)
+    assert len(cb.conflict_components()) > 1
+
+    fork = cb.fork()
+    fork.add_unsafe_cases(cases[100:])
+    check_conflicts(fork)
+    for case in cases[:60]:
+        fork.remove_case(case)
+        cb.remove_case(case)
+    check_conflicts(fork)
+    check_conflicts(cb)
+
+
+@pytest.mark.parametrize("seed", [1, 3, 5])
+def test_minimal_repair(seed):
+    cases = list(iter_synthetic_cases(30, n_pi=6, n_delta=6, reason_size=(1, 2), duplicate_rate=0.3,
+                                      conflict_rate=0.15, seed=seed))
+    cb = CaseBase(cases)
+    assert not cb.is_cb_consistent()
+
+    # the fewest cases covering every inconsistency, over all sets of tainted pairs
+    pairs = sorted(cb.order.incons_pairs)
+    edges = [(pair, other) for pair in pairs for other in cb.order.conflicts.neighbours(pair)]
+    fewest = min(sum(cb.order.pair_counts[pair] for pair in chosen)
+                 for size in range(len(pairs) + 1) for chosen in map(set, combinations(pairs, size))
+                 if all(a in chosen or b in chosen for a, b in edges))
+
+    for time_budget, exact in ((None, True), (0, False)):
+        removed, is_exact = cb.minimal_repair(time_budget)
+        assert is_exact == exact
+        assert len(removed) == fewest if exact else fewest <= len(removed) <= 2 * fewest
+        repaired = cb.fork()
+        for case in removed:
+            repaired.remove_case(case)
+        assert repaired.is_cb_consistent()
+
+    assert CaseBase(cases[:1]).minimal_repair() == ([], True)
@@ -0,0 +1,51 @@
+from pathlib import Path
+import pytest
+import yaml
+
+from briefcase.case import Case
+from briefcase.case_base import CaseBase
+from briefcase.defeat_index import DefeatIndex
+
+
+# Define a fixture to load test cases from the YAML file
+@pytest.fixture
+def test_cases():
+    test_data_path = Path(__file__).parent / 'test_data' / 'test_priority_order.yaml'
+    with open(test_data_path, 'r') as file:
+        return yaml.safe_load(file)
+
+
+@pytest.mark.parametrize(
+    "test_case_name",
+    [
+        "subset_big",
+        "multi_defeated_big",
+        "mega_case_10",
+        "combined_factors"
+    ],
+)
+@pytest.mark.parametrize("block_size", [2, 4096])
+def test_defeat_index_queries(test_cases, test_case_name, block_size, monkeypatch):
+    monkeypatch.setattr(DefeatIndex, "BLOCK_SIZE", block_size)
+    cases = [Case.from_dict(c) for c in test_cases[test_case_name]]
+    cb1 = CaseBase(cases)
+    index = cb1.order.defeat_index
+    defeats = list(cb1.order.bit_order.keys())
+    assert len(index) == len(defeats)
+
+    # query with the factor sets of every case, compared to checking every defeated set
+    for case in cases:
+        for bits in (case.reason_bits, case.defeated_bits, case.pi_bits | case.delta_bits):
+            assert sorted(index.supersets(bits)) == sorted(d for d in defeats if bits & ~d == 0)
+            assert sorted(index.subsets(bits)) == sorted(d for d in defeats if d & ~bits == 0)
+        if case.reason_bits:
+            assert frozenset(index.supersets(case.reason_bits)) == \
+                   frozenset(cb1.order.get_stronger_defeats_bits(case.reason_bits))
+
+
+def test_get_weaker_defeats(test_cases):
+    cases = [Case.from_dict(c) for c in test_cases["multi_defeated_big"]]
+    cb1 = CaseBase(cases)
+    for case in cases:
+        expected = frozenset(d for d in cb1.order.order.keys() if d.issubset(case.defeated))
+        assert cb1.order.get_weaker_defeats(case.defeated) == expected
@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from briefcase.case import Case
+from briefcase.case_base import CaseBase
+from briefcase.experiments import admit_by_constraint, balanced_orders, run_admissibility_trials, shuffle_orders
+
+
+@pytest.fixture
+def random_cases():
+    rng = random.Random(7)
+    cases = []
+    for _ in range(40):
+        pi = rng.sample("abcdef", rng.randint(1, 3))
+        delta = rng.sample("abcdef", rng.randint(1, 3))
+        decision = rng.choice(["pi", "delta"])
+        winning = pi if decision == "pi" else delta
+        cases.append(Case.from_dict({"pi": pi, "delta": delta, "decision": decision,
+                                     "reason": rng.sample(winning, 1)}))
+    return cases
+
+
+def test_shuffle_orders_match_shuffle():
+    data = list(range(10))
+    random.seed(42)
+    expected = []
+    for _ in range(3):
+        temp_data = data[:]
+        random.shuffle(temp_data)
+        expected.append(temp_data)
+    assert shuffle_orders(10, 3) == expected
+
+
+@pytest.mark.parametrize("incons", ["NO", "NO_NEW"])
+def test_trials_independent_of_workers(random_cases, incons):
+    shuffles = [[random_cases[i] for i in order] for order in shuffle_orders(len(random_cases), 6, seed=1)]
+    shuffles += [[random_cases[i] for i in order]
+                 for order in balanced_orders([c.decision for c in random_cases], 2, seed=1)]
+
+    sequential = run_admissibility_trials(shuffles, incons, workers=1)
+    parallel = run_admissibility_trials(shuffles, incons, workers=2)
+    assert vars(parallel) == vars(sequential)
+
+    for shuffle, score in zip(shuffles, sequential.scores):
+        cb = CaseBase([])
+        admitted = [cb.add_case(case, incons) for case in shuffle]
+        assert score == (admitted.index(False) if False in admitted else len(shuffle))
+
+
+def test_admit_by_constraint(random_cases):
+    constraints = ["NO", "NO_NEW", "NO_INVOLVEMENT", "HORTY", "NO_CORRUPTION", "ALL"]
+    order = shuffle_orders(len(random_cases), 1, seed=3)[0]
+    by_constraint = admit_by_constraint(random_cases, order, constraints)
+    for incons in constraints:
+        cb = CaseBase([])
+        cb.add_cases([random_cases[i] for i in order], incons)
+        assert by_constraint[incons].cases == cb.cases
+        assert by_constraint[incons].count_tainted_cases() == cb.count_tainted_cases()
+        assert by_constraint[incons].order.order == cb.order.order
@@ -0,0 +1,45 @@
+from pathlib import Path
+import pytest
+import yaml
+
+from briefcase.case import Case
+from briefcase.factor_registry import FactorRegistry, factor_registry
+
+
+# Define a fixture to load test cases from the YAML file
+@pytest.fixture
+def test_cases():
+    test_data_path = Path(__file__).parent / 'test_data' / 'test_priority_order.yaml'
+    with open(test_data_path, 'r') as file:
+        return yaml.safe_load(file)
+
+
+@pytest.mark.parametrize(
+    "test_case_name",
+    [
+        "simple_big",
+        "subset_big",
+    ],
+)
+def test_encode_decode(test_cases, test_case_name):
+    registry = FactorRegistry()
+    for c in test_cases[test_case_name]:
+        case = Case.from_dict(c)
+        for factors in (case.pi_factors, case.delta_factors, case.reason):
+            assert registry.decode(registry.encode(factors)) == factors
+
+
+@pytest.mark.parametrize(
+    "test_case_name",
+    [
+        "simple_big",
+        "subset_big",
+    ],
+)
+def test_case_bits(test_cases, test_case_name):
+    for c in test_cases[test_case_name]:
+        case = Case.from_dict(c)
+        assert factor_registry.decode(case.reason_bits) == case.reason
+        assert factor_registry.decode(case.defeated_bits) == case.defeated
+        # the reason is a subset of the winning side
+        assert case.reason_bits & ~(case.pi_bits | case.delta_bits) == 0
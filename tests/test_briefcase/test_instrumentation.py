@@ -0,0 +1,54 @@
+from briefcase.case import Case
+from briefcase.case_base import CaseBase
+from briefcase.factor import Factor
+from briefcase.enums import decision_enum
+from briefcase.instrumentation import TIMED_METHODS, instrumentation
+from briefcase.priority_order import PriorityOrder
+
+
+def make_cases():
+    return [
+        Case.from_dict({"pi": ["p1", "p2"], "delta": ["d1", "d2"], "decision": "pi", "reason": ["p1"]}),
+        Case.from_dict({"pi": ["p1"], "delta": ["d1", "d3"], "decision": "pi", "reason": ["p1"]}),
+        Case.from_dict({"pi": ["p1", "p3"], "delta": ["d1"], "decision": "delta", "reason": ["d1"]}),
+        Case.from_dict({"pi": ["p2"], "delta": ["d2"], "decision": "delta", "reason": ["d2"]}),
+    ]
+
+
+def test_disabled_methods_are_the_originals():
+    originals = {(cls, name): cls.__dict__[name] for cls, names in TIMED_METHODS.items() for name in names}
+    with instrumentation.collect():
+        assert instrumentation.enabled
+        assert PriorityOrder.__dict__["is_consistent_bits"] is not originals[(PriorityOrder, "is_consistent_bits")]
+        with instrumentation.collect(reset=False):
+            pass
+        assert instrumentation.enabled  # a nested collection leaves the outer one enabled
+    assert not instrumentation.enabled
+    assert {(cls, name): cls.__dict__[name] for cls, names in TIMED_METHODS.items() for name in names} == originals
+
+
+def test_collect():
+    cases = make_cases()
+    with instrumentation.collect():
+        cb = CaseBase([])
+        cb.add_cases(cases, "NO")
+        incons_pairs = cb.order.get_incons_pairs_with_case(frozenset([Factor("d1", decision_enum.delta)]),
+                                                           frozenset([Factor("p1", decision_enum.pi)]))
+    snapshot = instrumentation.snapshot()
+
+    calls = snapshot["calls"]
+    assert calls["is_case_admissible_bits"]["calls"] == calls["no_incons_bits"]["calls"] == len(cases)
+    assert "horty_incons_bits" not in calls
+    assert calls["get_incons_pairs_with_case"]["calls"] == 1
+    assert all(stats["total_time"] >= stats["max_time"] >= 0 for stats in calls.values())
+
+    sizes = snapshot["sizes"]
+    assert sizes["get_incons_pairs_with_case.result"]["total"] == len(incons_pairs) == 2
+    walked = sizes["get_stronger_defeats_bits.posting"]["total"]
+    assert walked == sum(snapshot["fan_out"].values()) > 0
+
+    # nothing is recorded once collection is over
+    cb.add_case(cases[0], "NO")
+    assert instrumentation.snapshot() == snapshot
+    instrumentation.reset()
+    assert instrumentation.snapshot() == {"calls": {}, "sizes": {}, "fan_out": {}}
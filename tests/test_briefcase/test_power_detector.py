@@ -83,3 +83,53 @@ def test_power_cb_singleton_case(test_cases, test_case_name):
         cb2.add_case(new_case)
 
         assert cb2.order.PD.cb_power() == empty_powers
+
+
+def materialised_cb_power(cb):
+    # count the edges by listing every one of them
+    edges = {}
+    for defeated, reason_set in cb.order.order.items():
+        reason_supersets = cb.order.PD.get_non_proper_supersets(reason_set)
+        for subset_defeated in cb.order.PD.get_non_proper_subsets(defeated):
+            edges.setdefault(subset_defeated, set()).update(reason_supersets)
+    return sum(len(reason_set) for reason_set in edges.values())
+
+
+@pytest.fixture
+def order_test_cases():
+    test_data_path = Path(__file__).parent / 'test_data' / 'test_priority_order.yaml'
+    with open(test_data_path, 'r') as file:
+        return yaml.safe_load(file)
+
+
+@pytest.mark.parametrize(
+    "test_case_name",
+    [
+        "simple_big",
+        "distractor_small",
+        "subset_big",
+        "multi_defeated_big",
+        "mega_case_10",
+        "combined_factors"
+    ],
+)
+def test_cb_power_materialised(order_test_cases, test_case_name):
+    cb1 = CaseBase()
+    for c in order_test_cases[test_case_name]:
+        cb1.add_case(Case.from_dict(c))
+        assert cb1.order.PD.cb_power() == materialised_cb_power(cb1)
+
+
+@pytest.mark.parametrize(
+    "test_case_name",
+    [
+        "multi_defeated_big",
+        "combined_factors"
+    ],
+)
+def test_estimate_cb_power(order_test_cases, test_case_name):
+    cases = [Case.from_dict(c) for c in order_test_cases[test_case_name]]
+    cb1 = CaseBase(cases)
+    estimate, (low, high) = cb1.order.PD.estimate_cb_power(samples=2000, confidence=0.999, seed=42)
+    assert low <= cb1.order.PD.cb_power() <= high
+    assert low <= estimate <= high
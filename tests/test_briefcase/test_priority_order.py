@@ -74,10 +74,10 @@ def test_add_order_with_subsets_id(test_cases, test_case_name):
     cs = test_cases[test_case_name]
     case = Case.from_dict(cs[0])  # get first case
     order = PriorityOrder()  # blank priority order
-    order.add_order_with_subsets(case.reason, case.defeated())  # add one element
+    order.add_order_with_subsets(case.reason, case.defeated)  # add one element
     # check if items added, and that the id is the same id
-    assert any(case.defeated() is obj for obj in order.order.keys())
-    assert any(case.defeated() is obj for subset in order.defeated_factor_index.values() for obj in subset)
+    assert any(case.defeated is obj for obj in order.order.keys())
+    assert any(case.defeated is obj for subset in order.defeated_factor_index.values() for obj in subset)
 
 
 @pytest.mark.parametrize(
@@ -94,7 +94,57 @@ def test_get_incons_pairs_with_case(test_cases, test_case_name):
 
     inconsistent_case = Case.from_dict(cs[-1])
 
-    answer = [(cases[v].reason, cases[v].defeated()) for v in test_cases[test_case_name]['answer']]
-    expected = cb1.order.get_incons_pairs_with_case(inconsistent_case.reason, inconsistent_case.defeated())
+    answer = [(cases[v].reason, cases[v].defeated) for v in test_cases[test_case_name]['answer']]
+    expected = cb1.order.get_incons_pairs_with_case(inconsistent_case.reason, inconsistent_case.defeated)
     assert Counter(expected) == Counter(answer)
 
+
+
+# the tracked inconsistent pairs should match a full rescan of the order
+@pytest.mark.parametrize(
+    "test_case_name",
+    [
+        "simple_small",
+        "simple_big",
+        "distractor_small",
+        "subset_small",
+        "subset_big",
+        "multi_defeated_small",
+        "multi_defeated_big",
+        "mega_case_10",
+        "combined_factors"
+    ],
+)
+def test_incons_pairs_tracking(test_cases, test_case_name):
+    cs = test_cases[test_case_name]
+    cb1 = CaseBase([])
+    for c in cs:
+        cb1.add_case(Case.from_dict(c))
+        order = cb1.order
+        rescan = {(reason, defeated) for defeated, reasons in order.bit_order.items() for reason in reasons
+                  if not order.is_consistent_bits(reason, defeated)}
+        assert order.incons_pairs == rescan
+        assert cb1.is_cb_consistent() == (not rescan)
+
+
+def test_remove_pair():
+    a = Case.from_dict({"pi": ["p1"], "delta": ["d1"], "decision": "pi", "reason": ["p1"]})
+    b = Case.from_dict({"pi": ["p1"], "delta": ["d1"], "decision": "delta", "reason": ["d1"]})
+    cb1 = CaseBase([a, a, b])
+    # one case of the pair is removed at a time, with its factors
+    assert cb1.order.remove_pair(a.reason, a.defeated)
+    assert cb1.count_tainted_cases() == 2
+    assert cb1.order.PD.factor_list == CaseBase([a, b]).order.PD.factor_list
+    assert a.reason in cb1.order.order[a.defeated]
+
+    cb1.remove_case(a)
+    assert a.reason not in cb1.order.order.get(a.defeated, ())
+    assert cb1.count_tainted_cases() == 0
+    # the case the order no longer has is not taken off the counts again
+    assert not cb1.order.remove_case(a)
+    assert not cb1.order.remove_pair(a.reason, a.defeated)
+    assert cb1.order.pair_counts.get((a.reason_bits, a.defeated_bits), 0) == 0
+
+    cb1.add_case(a)
+    assert cb1.count_tainted_cases() == 2
+    assert cb1.order.PD.factor_list == CaseBase([a, b]).order.PD.factor_list
@@ -0,0 +1,44 @@
+import pytest
+
+from briefcase.case_base import CaseBase
+from briefcase.case_stream import iter_cases
+from briefcase.enums import decision_enum
+from briefcase.synthetic import generate_case_base, iter_synthetic_cases, write_synthetic_cases
+
+
+def test_same_seed_same_cases():
+    assert list(iter_synthetic_cases(200, seed=1)) == list(iter_synthetic_cases(200, seed=1))
+    assert list(iter_synthetic_cases(200, seed=1)) != list(iter_synthetic_cases(200, seed=2))
+
+
+@pytest.mark.parametrize("reason_size", [None, (1, 1), (1, 3)])
+def test_consistent_without_conflicts(reason_size):
+    cases = list(iter_synthetic_cases(500, n_pi=8, n_delta=8, reason_size=reason_size, duplicate_rate=0.2))
+    cb = generate_case_base(500, n_pi=8, n_delta=8, reason_size=reason_size, duplicate_rate=0.2)
+    assert cb.cases == cases
+    assert cb.is_cb_consistent()
+    for case in cases:
+        winning = case.pi_factors if case.decision == decision_enum.pi else case.delta_factors
+        assert case.reason and case.reason <= winning
+        if reason_size is None:
+            assert case.reason == winning
+
+
+def test_every_conflict_is_inconsistent():
+    cases = list(iter_synthetic_cases(60, n_pi=6, n_delta=6, reason_size=(1, 2), conflict_rate=1.0))
+    for k in range(1, len(cases)):
+        assert not CaseBase(cases[:k]).is_consistent_with(cases[k])
+
+
+def test_rates():
+    cases = list(iter_synthetic_cases(2000, pi_rate=0.25))
+    assert 400 < sum(case.decision == decision_enum.pi for case in cases) < 600
+    assert len(set(iter_synthetic_cases(100, duplicate_rate=1.0))) == 1
+    with pytest.raises(ValueError):
+        list(iter_synthetic_cases(10, conflict_rate=1.5))
+
+
+def test_write_synthetic_cases(tmp_path):
+    path = tmp_path / "synthetic.jsonl"
+    write_synthetic_cases(path, 100, conflict_rate=0.1)
+    assert list(iter_cases(path)) == list(iter_synthetic_cases(100, conflict_rate=0.1))
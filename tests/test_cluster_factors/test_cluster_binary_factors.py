@@ -5,7 +5,8 @@ import pytest
 import yaml
 import pandas as pd
 from cluster_factors.cluster_binary_factors import (cluster_factors_corr, cluster_factors_voting, cluster_factors_rand,
-                                                    cluster_factors_rand_un)
+                                                    cluster_factors_rand_un, cluster_factors_chunked)
+from cluster_factors.factor_statistics import RowReservoir
 
 # Define a fixture to load test cases from the YAML file
 @pytest.fixture
@@ -70,4 +71,74 @@ def test_cluster_factors_rand_un(test_cases, test_case_name):
     df = pd.DataFrame(data["cb"])
     answer = data["answer_rand_un"]
     np.random.seed(42)  # Ensure reproducible results
-    assert cluster_factors_rand(df, "y") == answer
\ No newline at end of file
+    assert cluster_factors_rand(df, "y") == answer
+
+@pytest.mark.parametrize(
+    "test_case_name",
+    [
+        "CB1",
+        "CB2"
+    ],
+)
+def test_cluster_factors_sparse(test_cases, test_case_name):
+    data = test_cases[test_case_name]
+    df = pd.DataFrame(data["cb"])
+    sparse_df = df.astype(pd.SparseDtype(int, 0))
+    assert cluster_factors_corr(sparse_df, "y") == data["answer_corr"]
+    assert cluster_factors_voting(sparse_df, "y") == data["answer_voting"]
+
+
+def test_cluster_factors_thresholds(test_cases):
+    df = pd.DataFrame(test_cases["CB2"]["cb"])
+    correlations = df.corr()["y"].drop("y")
+    for threshold in (0.1, 0.5, 0.9):
+        expected = {key: "pi" if value > threshold else ("delta" if value < -threshold else "un")
+                    for key, value in correlations.items()}
+        assert cluster_factors_corr(df, "y", threshold) == expected
+    assert set(cluster_factors_voting(df, "y", threshold=5).values()) == {"un"}
+
+
+def chunks_of(df, size):
+    return (df.iloc[start:start + size] for start in range(0, len(df), size))
+
+
+@pytest.mark.parametrize(
+    "test_case_name",
+    [
+        "CB1",
+        "CB2"
+    ],
+)
+def test_cluster_factors_chunked(test_cases, test_case_name):
+    data = test_cases[test_case_name]
+    df = pd.DataFrame(data["cb"])
+    for size in (1, 2, len(df)):
+        assert cluster_factors_chunked(chunks_of(df, size), "y", "corr") == data["answer_corr"]
+        assert cluster_factors_chunked(chunks_of(df, size), "y", "rand") == cluster_factors_rand(df, "y")
+
+    # with balanced classes which fit in the reservoirs every row is a vote, as it is for cluster_factors_voting
+    rng = np.random.default_rng(0)
+    balanced = pd.DataFrame(rng.random((40, 6)) < 0.4, columns=[f"f{i}" for i in range(6)])
+    balanced["y"] = [True, False] * 20
+    for size in (3, 40):
+        assert cluster_factors_chunked(chunks_of(balanced, size), "y", "vote") == cluster_factors_voting(balanced, "y")
+
+
+@pytest.mark.parametrize("cluster_type", ["corr", "vote", "rand_un", "rand"])
+def test_cluster_factors_chunked_no_chunks(cluster_type):
+    with pytest.raises(ValueError, match="no chunks to cluster"):
+        cluster_factors_chunked(iter([]), "y", cluster_type)
+
+
+def test_row_reservoir():
+    # one hot rows, so the sum of a sample counts how often each row was kept
+    rows = np.eye(50, dtype=bool)
+    rng = np.random.default_rng(1)
+    kept = np.zeros(50)
+    for _ in range(2000):
+        reservoir = RowReservoir(10, 50, rng)
+        for start in range(0, 50, 7):
+            reservoir.add(rows[start:start + 7])
+        kept += reservoir.sample(len(reservoir)).sum(axis=0)
+    # every row is kept with probability 10 / 50
+    assert np.all(np.abs(kept / 2000 - 0.2) < 0.05)